@@ -0,0 +1,144 @@
+import logging
+
+from common import DerivedStore, load_csv_records
+from survey_schema import QUESTIONS, is_missing
+
+logger = logging.getLogger(__name__)
+
+# ---- Cube Configuration ----
+CUBE_PATH = "analytics.db"
+DIMENSIONS = ("region", "org_type", "experience")
+ALL = "__all__"      # per-question row holding answered count and value sum
+MISSING = ""         # dimension value for respondents who skipped it
+CUBE_QUESTIONS = tuple(q for q in QUESTIONS if q.dtype in ("ordinal", "list", "int"))
+
+
+# ---- Incrementally Maintained Aggregate Cube ----
+class AggregateCube(DerivedStore):
+    """Pre-aggregated counts and sums per (region, org_type, experience) cell.
+
+    For every ordinal, multi-select and slider question the cube keeps one
+    row per selected option with its count, plus an ``__all__`` row holding
+    how many answered and the sum of their values (ordinal code or slider
+    value). ``add`` updates these rows in one small transaction, so the cube
+    never needs recomputing; queries only touch a bounded number of cells
+    (dimension values x options), whatever the number of responses.
+
+    Backed by SQLite in WAL mode so the survey process can write while a
+    separate dashboard process reads; ``DerivedStore`` tracks which live
+    responses are already in.
+    """
+
+    def __init__(self, path=CUBE_PATH):
+        super().__init__(path)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cells ("
+            "question TEXT NOT NULL, option TEXT NOT NULL, region TEXT NOT NULL, "
+            "org_type TEXT NOT NULL, experience TEXT NOT NULL, n INTEGER NOT NULL, total REAL NOT NULL, "
+            "PRIMARY KEY (question, option, region, org_type, experience))"
+        )
+
+    @staticmethod
+    def _increments(record):
+        cell = tuple(MISSING if is_missing(record.get(d)) else str(record[d]) for d in DIMENSIONS)
+        for q in CUBE_QUESTIONS:
+            value = record.get(q.column)
+            if q.dtype == "list":
+                if value is None:
+                    continue
+                for option in value:
+                    yield (q.column, option) + cell + (1, 0.0)
+                yield (q.column, ALL) + cell + (1, float(len(value)))
+            elif is_missing(value):
+                continue
+            elif q.dtype == "ordinal":
+                code = q.encode(value)
+                if code is None:
+                    continue
+                yield (q.column, value) + cell + (1, float(code))
+                yield (q.column, ALL) + cell + (1, float(code))
+            else:
+                yield (q.column, ALL) + cell + (1, float(value))
+
+    def add_many(self, records, ids=None, advance_to=None):
+        """Fold canonical records into the cube; returns how many were added.
+
+        ``ids`` are the records' backend ids, for responses from the live
+        store: any already folded in are skipped. External imports (e.g. the
+        legacy CSV) pass none. ``advance_to`` is for ``catch_up``.
+        """
+        records = list(records)
+        with self._transaction() as conn:
+            if ids is not None:
+                new = self._claim(conn, ids, advance_to)
+                records = [record for record, keep in zip(records, new) if keep]
+            if records:
+                conn.executemany(
+                    "INSERT INTO cells VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(question, option, region, org_type, experience) "
+                    "DO UPDATE SET n = n + excluded.n, total = total + excluded.total",
+                    [row for record in records for row in self._increments(record)],
+                )
+                conn.execute(
+                    "INSERT INTO meta VALUES ('responses', ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (len(records),),
+                )
+        return len(records)
+
+    def add(self, record, row_id=None):
+        return self.add_many([record], None if row_id is None else [row_id])
+
+    def reset(self):
+        super().reset()
+        self._conn().execute("DELETE FROM cells")
+
+    # ---- Queries ----
+    def crosstab(self, column, by=()):
+        """Counts per option for ``column``, grouped by the dimensions in ``by``.
+
+        Returns a list of dicts with the ``by`` dimensions, ``option`` and ``n``.
+        """
+        by = [d for d in by if d in DIMENSIONS]
+        select = ", ".join(by + ["option", "SUM(n)"])
+        group = ", ".join(by + ["option"])
+        cur = self._conn().execute(
+            f"SELECT {select} FROM cells WHERE question = ? AND option != ? GROUP BY {group}", (column, ALL)
+        )
+        return [dict(zip(by + ["option", "n"], row)) for row in cur]
+
+    def summary(self, column, by=()):
+        """Answered count and mean value (ordinal code or slider value) per group."""
+        by = [d for d in by if d in DIMENSIONS]
+        select = ", ".join(by + ["SUM(n)", "SUM(total)"])
+        group = f" GROUP BY {', '.join(by)}" if by else ""
+        cur = self._conn().execute(
+            f"SELECT {select} FROM cells WHERE question = ? AND option = ?{group}", (column, ALL)
+        )
+        out = []
+        for row in cur:
+            n, total = row[-2], row[-1]
+            out.append(dict(zip(by, row), n=n, mean=(total / n) if n else None))
+        return out
+
+    def total_responses(self):
+        return self._meta("responses")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild the analytics cube from CSV exports.")
+    parser.add_argument("csv", nargs="+", help="response CSV files in any historical layout")
+    parser.add_argument("--cube", default=CUBE_PATH)
+    parser.add_argument("--append", action="store_true", help="add to the existing cube instead of rebuilding")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    cube = AggregateCube(args.cube)
+    if not args.append:
+        cube.reset()
+    for path in args.csv:
+        added = cube.add_many(load_csv_records(path))
+        logger.info("Added %d response(s) from %s", added, path)
@@ -0,0 +1,192 @@
+import base64
+import hashlib
+import random
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from github import GithubException
+
+from github_client import CachedRepo, GitHubClient
+
+
+def _sha(*parts):
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+# ---- In-Process Stand-In for a PyGithub Repository ----
+class FakeRepo:
+    """Just enough of ``github.Repository`` for the app's write and read paths.
+
+    Implements the contents API (``get_contents``/``update_file``/
+    ``create_file``) and the Git Data API calls used by
+    ``PartitionedCommitWriter``. Every call sleeps ``latency`` seconds and is
+    counted in ``calls``. With probability ``conflict_rate`` a write finds
+    that another writer has just moved the branch and fails the way GitHub
+    does (409 for contents, 422 for a non-fast-forward ref update).
+    """
+
+    default_branch = "main"
+
+    def __init__(self, files=None, latency=0.0, conflict_rate=0.0, rate_limit=5000, seed=None):
+        self.latency = latency
+        self.conflict_rate = conflict_rate
+        self.calls = Counter()
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._blobs = {}
+        self._commits = {}
+        self.head = self._new_commit({path: self._put_blob(text) for path, text in (files or {}).items()}, [])
+
+    # -- bookkeeping --
+    def _call(self, name, billable=True):
+        with self._lock:
+            self.calls[name] += 1
+            if billable:
+                self.remaining -= 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _put_blob(self, text):
+        sha = _sha("blob", text)
+        self._blobs[sha] = text
+        return sha
+
+    def _new_commit(self, files, parents):
+        sha = _sha("commit", repr(sorted(files.items())), *parents, str(len(self._commits)))
+        self._commits[sha] = dict(files)
+        return sha
+
+    def _maybe_conflict(self):
+        # Another writer lands a commit just before ours.
+        if self._random.random() < self.conflict_rate:
+            files = dict(self._commits[self.head])
+            files["concurrent-writer.txt"] = self._put_blob(str(time.time()))
+            self.head = self._new_commit(files, [self.head])
+            return True
+        return False
+
+    def files(self, ref=None):
+        return {path: self._blobs[sha] for path, sha in self._commits[ref or self.head].items()}
+
+    # -- contents API --
+    def get_contents(self, path, ref=None):
+        self._call("get_contents")
+        with self._lock:
+            commit = ref or self.head
+            if commit not in self._commits:
+                commit = self.head
+            sha = self._commits[commit].get(path)
+            if sha is None:
+                raise GithubException(404, {"message": "Not Found"}, {})
+        return _FakeContentFile(self, path, ref, sha)
+
+    def update_file(self, path, message, content, sha):
+        self._call("update_file")
+        with self._lock:
+            if self._maybe_conflict() or self._commits[self.head].get(path) != sha:
+                raise GithubException(409, {"message": f"{path} does not match {sha}"}, {})
+            files = dict(self._commits[self.head])
+            files[path] = self._put_blob(content)
+            self.head = self._new_commit(files, [self.head])
+
+    def create_file(self, path, message, content):
+        self._call("create_file")
+        with self._lock:
+            if path in self._commits[self.head]:
+                raise GithubException(422, {"message": "sha wasn't supplied"}, {})
+            files = dict(self._commits[self.head])
+            files[path] = self._put_blob(content)
+            self.head = self._new_commit(files, [self.head])
+
+    # -- Git Data API --
+    def get_git_ref(self, ref):
+        self._call("get_git_ref")
+        return _FakeRef(self, self.head)
+
+    def get_git_commit(self, sha):
+        self._call("get_git_commit")
+        return SimpleNamespace(sha=sha, tree=SimpleNamespace(commit=sha))
+
+    def get_git_blob(self, sha):
+        self._call("get_git_blob")
+        content = base64.b64encode(self._blobs[sha].encode("utf-8")).decode("ascii")
+        return SimpleNamespace(sha=sha, encoding="base64", content=content)
+
+    def create_git_blob(self, content, encoding):
+        self._call("create_git_blob")
+        with self._lock:
+            return SimpleNamespace(sha=self._put_blob(content))
+
+    def create_git_tree(self, elements, base_tree=None):
+        self._call("create_git_tree")
+        with self._lock:
+            files = dict(self._commits[base_tree.commit]) if base_tree is not None else {}
+        for element in elements:
+            files[element._identity["path"]] = element._identity["sha"]
+        return SimpleNamespace(files=files)
+
+    def create_git_commit(self, message, tree, parents):
+        self._call("create_git_commit")
+        with self._lock:
+            return SimpleNamespace(sha=self._new_commit(tree.files, [p.sha for p in parents]))
+
+
+class _FakeRef:
+    def __init__(self, repo, sha):
+        self.repo = repo
+        self.object = SimpleNamespace(sha=sha)
+
+    def edit(self, sha, force=False):
+        self.repo._call("edit_ref")
+        with self.repo._lock:
+            if self.repo._maybe_conflict() or (not force and self.repo.head != self.object.sha):
+                raise GithubException(422, {"message": "Update is not a fast forward"}, {})
+            self.repo.head = sha
+            self.object.sha = sha
+
+
+class _FakeContentFile:
+    def __init__(self, repo, path, ref, sha):
+        self.repo = repo
+        self.path = path
+        self.ref = ref
+        self.sha = sha
+
+    @property
+    def decoded_content(self):
+        return self.repo._blobs[self.sha].encode("utf-8")
+
+    def update(self):
+        # Conditional request: a 304 is free, a changed file is a normal call.
+        with self.repo._lock:
+            sha = self.repo._commits[self.ref or self.repo.head].get(self.path)
+        if sha == self.sha:
+            self.repo._call("get_contents_304", billable=False)
+            return False
+        self.repo._call("get_contents")
+        self.sha = sha
+        return True
+
+
+# ---- Client Wired to the Fake ----
+class FakeGitHubClient(GitHubClient):
+    """``GitHubClient`` whose repository is a shared ``FakeRepo``."""
+
+    repo = None   # set by the benchmark before the app starts
+
+    def __init__(self, token=None, repo_name=None, **kwargs):
+        super().__init__(token or "fake-token", **kwargs)
+
+    def get_repo(self):
+        with self._lock:
+            if self._repo is None:
+                self._repo = CachedRepo(self.repo)
+            return self._repo
+
+    def rate_limit(self):
+        reset = time.time() + 3600
+        return {"remaining": self.repo.remaining, "limit": self.repo.rate_limit, "reset": reset}
@@ -0,0 +1,236 @@
+"""Headless load test: N simulated respondents against a fake GitHub.
+
+    python benchmarks/load_test.py --respondents 50 --concurrency 10 --latency 0.05 --conflict-rate 0.2
+
+Each respondent is a Streamlit ``AppTest`` session that walks all survey
+sections, answers questions and submits. Persistence goes through the real
+storage stack into ``FakeRepo``. ``AppTest`` swaps process-global runtime
+state on every run, so individual script runs are serialized; respondents
+still interleave, and their submissions are persisted concurrently by the
+shared queue and flusher threads. The report covers rerun latency per
+section, submission throughput, lost/duplicated rows and API calls per
+submission; every run is appended to ``benchmarks/results.jsonl`` and
+compared with the previous run that used the same parameters.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "weather_vsl_questionnaire.py")
+RESULTS_PATH = os.path.join(ROOT, "benchmarks", "results.jsonl")
+REGRESSION_THRESHOLD = 0.20   # flag metrics that got this much worse than the last comparable run
+_RUN_LOCK = threading.Lock()
+
+
+# ---- Simulated Respondent ----
+def _timed(at, section, timings):
+    with _RUN_LOCK:
+        start = time.perf_counter()
+        at.run()
+        timings[section].append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(f"app raised in section {section}: {at.exception[0].value}")
+
+
+def _click(at, label_prefix):
+    next(b for b in at.button if b.label.startswith(label_prefix)).click()
+
+
+def run_respondent(index, seed, interactions_per_section):
+    from streamlit.testing.v1 import AppTest
+
+    from survey_schema import SECTIONS, SURVEY
+
+    rng = random.Random(seed + index)
+    timings = defaultdict(list)
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    _timed(at, "landing", timings)
+    _click(at, "Start Survey")
+    for section_num, section in enumerate(SURVEY):
+        name = SECTIONS[section_num]
+        _timed(at, name, timings)
+        answered = 0
+        for q in section.questions:
+            if answered >= interactions_per_section and q.key != "q20_success_story":
+                break
+            widget = next((w for w in at.get(q.kind) if w.key == q.key), None)
+            if widget is None:
+                continue
+            if q.key == "q20_success_story":
+                widget.input(f"respondent-{index}")
+            elif q.kind in ("radio", "selectbox"):
+                widget.set_value(rng.choice(q.options))
+            elif q.kind == "multiselect":
+                widget.set_value(rng.sample(q.options, rng.randint(0, 2)))
+            elif q.kind == "slider":
+                widget.set_value(rng.randint(q.min_value, q.max_value))
+            else:
+                continue
+            _timed(at, name, timings)
+            answered += 1
+        if section_num < len(SURVEY) - 1:
+            _click(at, "Next")
+    _click(at, "✅ Submit")
+    _timed(at, "submit", timings)
+    _click(at, "Confirm Submission")
+    _timed(at, "submit", timings)
+    return timings
+
+
+# ---- Result Collection ----
+def committed_markers(repo):
+    markers = Counter()
+    for path, text in repo.files().items():
+        if not path.endswith(".csv"):
+            continue
+        for row in csv.DictReader(StringIO(text)):
+            story = row.get("success_story") or ""
+            if story.startswith("respondent-"):
+                markers[story] += 1
+    return markers
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+
+    def pick(p):
+        return values[min(int(round(p / 100 * (len(values) - 1))), len(values) - 1)]
+
+    return {"p50": pick(50), "p95": pick(95), "p99": pick(99), "max": values[-1], "n": len(values)}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_with_previous(result):
+    if not os.path.exists(RESULTS_PATH):
+        return []
+    previous = None
+    with open(RESULTS_PATH) as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["params"] == result["params"]:
+                previous = entry
+    if previous is None:
+        return []
+    regressions = []
+    for section, stats in result["rerun_latency"].items():
+        before = previous["rerun_latency"].get(section, {}).get("p95")
+        if before and stats["p95"] > before * (1 + REGRESSION_THRESHOLD):
+            regressions.append(f"rerun p95 [{section}]: {before * 1000:.1f}ms -> {stats['p95'] * 1000:.1f}ms")
+    for metric in ("api_calls_per_submission", "lost", "duplicated"):
+        before, after = previous[metric], result[metric]
+        if after > before * (1 + REGRESSION_THRESHOLD) and after - before > 1e-9:
+            regressions.append(f"{metric}: {before} -> {after}")
+    if result["commit_throughput"] < previous["commit_throughput"] * (1 - REGRESSION_THRESHOLD):
+        regressions.append(f"commit_throughput: {previous['commit_throughput']:.2f} -> "
+                           f"{result['commit_throughput']:.2f} rows/s")
+    return regressions
+
+
+# ---- Entry Point ----
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--respondents", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--backend", choices=("sqlite", "github"), default="sqlite")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every fake API call")
+    parser.add_argument("--conflict-rate", type=float, default=0.1, help="probability a write hits a sha conflict")
+    parser.add_argument("--interactions", type=int, default=3, help="answers changed per section")
+    parser.add_argument("--flush-rows", type=int, default=10)
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-save", action="store_true", help="do not append to results.jsonl")
+    args = parser.parse_args()
+
+    # Storage reads these at import time, so set them before importing anything from the app.
+    os.environ.update({
+        "GITHUB_TOKEN": "fake-token",
+        "WRVSL_STORAGE": args.backend,
+        "WRVSL_FLUSH_MAX_ROWS": str(args.flush_rows),
+        "WRVSL_FLUSH_MAX_AGE": "0.5",
+        "WRVSL_FLUSH_POLL": "0.1",
+    })
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(tempfile.mkdtemp(prefix="wrvsl-bench-"))
+
+    import github_client
+    from fake_github import FakeGitHubClient, FakeRepo
+
+    with open(os.path.join(ROOT, "responses.csv"), encoding="utf-8") as f:
+        repo = FakeRepo({"responses.csv": f.read()}, latency=args.latency,
+                        conflict_rate=args.conflict_rate, seed=args.seed)
+    FakeGitHubClient.repo = repo
+    github_client.GitHubClient = FakeGitHubClient
+
+    timings = defaultdict(list)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(run_respondent, i, args.seed, args.interactions) for i in range(args.respondents)]
+        for future in futures:
+            for section, values in future.result().items():
+                timings[section].extend(values)
+    submitted = time.perf_counter()
+
+    expected = {f"respondent-{i}" for i in range(args.respondents)}
+    markers = committed_markers(repo)
+    while set(markers) < expected and time.perf_counter() - submitted < args.drain_timeout:
+        time.sleep(0.2)
+        markers = committed_markers(repo)
+    drained = time.perf_counter()
+
+    billable = sum(n for name, n in repo.calls.items() if name != "get_contents_304")
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "params": {k: getattr(args, k) for k in
+                   ("respondents", "concurrency", "backend", "latency", "conflict_rate", "interactions", "flush_rows")},
+        "rerun_latency": {section: percentiles(values) for section, values in timings.items()},
+        "submit_throughput": args.respondents / (submitted - started),
+        "commit_throughput": len(set(markers) & expected) / (drained - started),
+        "lost": len(expected - set(markers)),
+        "duplicated": sum(n - 1 for n in markers.values() if n > 1),
+        "api_calls_per_submission": billable / args.respondents,
+        "api_calls": dict(repo.calls),
+        "commits": len(repo._commits) - 1,
+    }
+
+    print(f"{args.respondents} respondents, concurrency {args.concurrency}, backend {args.backend}")
+    print(f"{'section':<40}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'n':>8}")
+    for section, stats in result["rerun_latency"].items():
+        print(f"{section:<40}{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}"
+              f"{stats['p99'] * 1000:>10.1f}{stats['n']:>8}")
+    print(f"submit throughput: {result['submit_throughput']:.2f} respondents/s")
+    print(f"commit throughput: {result['commit_throughput']:.2f} rows/s ({result['commits']} commits)")
+    print(f"lost rows: {result['lost']}, duplicated rows: {result['duplicated']}")
+    print(f"API calls per submission: {result['api_calls_per_submission']:.2f} {result['api_calls']}")
+
+    regressions = compare_with_previous(result)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not args.no_save:
+        with open(RESULTS_PATH, "a") as f:
+            f.write(json.dumps(result) + "\n")
+    return 1 if regressions or result["lost"] or result["duplicated"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""Bulk import of responses collected offline (workshop sheets, paper forms).
+
+    python bulk_import.py sheet.xlsx more.csv --target github --batch-size 500
+
+Rows are validated column by column against the survey schema, valid rows
+are normalized to the canonical columns and stored one batch per commit
+(GitHub) or transaction (SQLite); invalid rows go to a rejection report.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from common import chunks
+from survey_schema import CHOICE_KINDS, COLUMN_ALIASES, QUESTIONS, canonicalize, parse_list
+
+logger = logging.getLogger(__name__)
+
+# ---- Import Configuration ----
+BATCH_SIZE = 500
+REPORT_PATH = "rejections.csv"
+EXCEL_SUFFIXES = (".xlsx", ".xlsm", ".xls")
+
+
+# ---- Reading ----
+def read_sheet(path):
+    """Load a CSV or Excel file with every cell as text (missing cells as NaN)."""
+    if path.lower().endswith(EXCEL_SUFFIXES):
+        # Needs openpyxl (xlsx) or xlrd (xls), which only this command uses.
+        frame = pd.read_excel(path, dtype=str, sheet_name=0)
+    else:
+        frame = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""], encoding="utf-8-sig")
+    frame.index = frame.index + 2   # spreadsheet line numbers (header is line 1)
+    return frame
+
+
+def to_canonical_columns(raw):
+    """Rename columns in any historical layout to canonical ones.
+
+    Returns ``(frame, ignored)``; when several source columns map to the same
+    question the first non-empty value wins, as in ``canonicalize``.
+    """
+    frame, ignored = pd.DataFrame(index=raw.index), []
+    for name in raw.columns:
+        q = COLUMN_ALIASES.get(str(name).strip())
+        if q is None:
+            ignored.append(name)
+            continue
+        column = raw[name].str.strip().replace("", np.nan)
+        frame[q.column] = column if q.column not in frame else frame[q.column].fillna(column)
+    return frame, ignored
+
+
+# ---- Vectorized Validation ----
+def _normalize_choice(q, column):
+    if not q.ordinal:
+        return column
+    # Paper forms often record scale answers as 1-based digits.
+    positions = pd.to_numeric(column, errors="coerce")
+    digits = ~column.isin(q.options) & positions.isin(range(1, len(q.options) + 1))
+    return column.mask(digits, positions.map(dict(enumerate(q.options, start=1))))
+
+
+def validate_frame(frame):
+    """Check every column against its question in one pass per column.
+
+    Returns ``(frame, errors)``: ``frame`` with scale digits resolved,
+    multi-selects parsed to lists and sliders as numbers, and ``errors`` a
+    DataFrame of ``line, column, value, error`` for each rejected cell.
+    """
+    frame = frame.copy()
+    errors = []
+    for q in QUESTIONS:
+        if q.column not in frame:
+            continue
+        column = raw = frame[q.column]   # ``raw`` keeps the cells as written, for the report
+        present = column.notna()
+        if q.kind in CHOICE_KINDS:
+            column = frame[q.column] = _normalize_choice(q, column)
+            bad = present & ~column.isin(q.options)
+            message = "not one of the allowed options"
+        elif q.kind == "multiselect":
+            column = frame[q.column] = column.map(parse_list, na_action="ignore")
+            items = column.explode()
+            unknown = items.notna() & ~items.isin(q.options)
+            bad = unknown.groupby(level=0).any().reindex(frame.index, fill_value=False)
+            message = "contains options that are not allowed"
+        elif q.kind == "slider":
+            numbers = pd.to_numeric(column, errors="coerce")
+            bad = present & ~(numbers.between(q.min_value, q.max_value) & (numbers % 1 == 0))
+            frame[q.column] = numbers
+            message = f"not a whole number between {q.min_value} and {q.max_value}"
+        elif q.max_words is not None:
+            bad = column.str.split().str.len() > q.max_words
+            message = f"more than {q.max_words} words"
+        else:
+            continue
+        if bad.any():
+            errors.append(pd.DataFrame({
+                "line": frame.index[bad], "column": q.column,
+                "value": raw[bad].astype(str).values, "error": message,
+            }))
+    if errors:
+        errors = pd.concat(errors, ignore_index=True).sort_values(["line", "column"], kind="stable")
+    else:
+        errors = pd.DataFrame(columns=["line", "column", "value", "error"])
+    return frame, errors
+
+
+def prepare(path):
+    """Read, validate and normalize one file.
+
+    Returns ``(records, rejected, stats)``: canonical records for the valid
+    rows, the rejection rows (with ``file``) and counts for logging.
+    """
+    raw = read_sheet(path)
+    frame, ignored = to_canonical_columns(raw)
+    empty = frame.isna().all(axis=1)
+    frame = frame[~empty]
+    frame, errors = validate_frame(frame)
+    bad_lines = set(errors["line"])
+    valid = frame[~frame.index.isin(bad_lines)].astype(object)
+    records = [canonicalize(row) for row in valid.where(valid.notna(), None).to_dict("records")]
+    errors.insert(0, "file", os.path.basename(path))
+    stats = {"rows": len(raw), "empty": int(empty.sum()), "rejected": len(bad_lines),
+             "valid": len(records), "ignored_columns": ignored}
+    return records, errors, stats
+
+
+# ---- Persisting in Batches ----
+def import_source(records, batch_size):
+    """Checkpoint name for importing ``records`` in batches of ``batch_size``.
+
+    Derived from the content, so re-running the same files finds the batches
+    an earlier, interrupted run already committed.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(batch_size).encode())
+    for record in records:
+        digest.update(json.dumps(record, sort_keys=True, default=str).encode("utf-8") + b"\n")
+    return f"import-{digest.hexdigest()}"
+
+
+def import_to_github(records, client, branch=None, batch_size=BATCH_SIZE, day=None):
+    """One commit per batch, each waiting until the quota can cover it with the reserve intact.
+
+    Every commit records its batch number under ``import_source`` in the
+    manifest, so a re-run after a failure skips the batches that landed.
+    """
+    from storage import PartitionedCommitWriter
+
+    writer = PartitionedCommitWriter(client.get_repo, branch)
+    source = import_source(records, batch_size)
+    imported = 0
+    for number, batch in enumerate(chunks(records, batch_size), start=1):
+        needed = writer.request_cost(batch, day)
+        delay = client.write_delay(needed)
+        while delay:
+            time.sleep(delay)
+            delay = client.write_delay(needed)
+        if writer.commit(batch, day, checkpoint=(source, number)):
+            imported += len(batch)
+            logger.info("Committed %d/%d response(s) (%d API requests left)",
+                        imported, len(records), client.rate_limit()["remaining"])
+        else:
+            logger.info("Batch %d was committed by an earlier run; skipped", number)
+    return imported
+
+
+def import_to_sqlite(records, backend, batch_size=BATCH_SIZE, day=None):
+    """One transaction per batch, each then folded into the analytics cube and text index.
+
+    Safe while the survey is live: both stores track response ids, so the
+    catch-up neither recounts submissions the app added itself nor misses
+    rows appended in between. ``day`` (YYYY-MM-DD) dates the rows, for the
+    keyword trends and their GitHub partition; defaults to now.
+    """
+    from analytics import AggregateCube
+    from text_index import TextIndex
+
+    cube, index = AggregateCube(), TextIndex()
+    submitted_at = None
+    if day is not None:
+        submitted_at = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+    imported = 0
+    for batch in chunks(records, batch_size):
+        imported += backend.append_many(batch, submitted_at)
+        cube.catch_up(backend)
+        index.catch_up(backend)
+    return imported
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("files", nargs="+", help="CSV or Excel files, in any historical column layout")
+    parser.add_argument("--target", choices=("sqlite", "github", "none"), default="sqlite",
+                        help="where valid rows go; 'none' only validates")
+    parser.add_argument("--db", default=None, help="SQLite store (default: the app's)")
+    parser.add_argument("--repo", default=None)
+    parser.add_argument("--branch", default=None)
+    parser.add_argument("--day", default=None, help="date (YYYY-MM-DD) the rows were collected, e.g. the event day")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--report", default=REPORT_PATH, help="CSV listing every rejected cell")
+    parser.add_argument("--partial", action="store_true",
+                        help="import the valid rows even if some rows were rejected")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    records, reports = [], []
+    for path in args.files:
+        file_records, rejected, stats = prepare(path)
+        records.extend(file_records)
+        reports.append(rejected)
+        logger.info("%s: %d row(s), %d valid, %d rejected, %d empty", path,
+                    stats["rows"], stats["valid"], stats["rejected"], stats["empty"])
+        if stats["ignored_columns"]:
+            logger.warning("%s: ignored columns with no matching question: %s",
+                           path, ", ".join(map(str, stats["ignored_columns"])))
+
+    report = pd.concat(reports, ignore_index=True)
+    if len(report):
+        report.to_csv(args.report, index=False)
+        logger.warning("%d invalid cell(s) listed in %s", len(report), args.report)
+        if not args.partial and args.target != "none":
+            raise SystemExit("Nothing imported; fix the rejected rows or pass --partial.")
+
+    if args.target == "github":
+        from github_client import GitHubClient
+        from storage import REPO_NAME
+
+        client = GitHubClient(os.environ["GITHUB_TOKEN"], args.repo or REPO_NAME)
+        imported = import_to_github(records, client, args.branch, args.batch_size, args.day)
+    elif args.target == "sqlite":
+        from storage import SQLITE_PATH, SQLiteBackend
+
+        imported = import_to_sqlite(records, SQLiteBackend(args.db or SQLITE_PATH), args.batch_size, args.day)
+    else:
+        imported = 0
+    logger.info("Imported %d response(s)", imported)
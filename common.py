@@ -0,0 +1,155 @@
+import csv
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from survey_schema import canonicalize
+
+
+# ---- Batching ----
+def chunks(items, size):
+    """Yield lists of up to ``size`` items from any iterable, without reading ahead."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ---- Reading Responses ----
+def load_csv_records(path, rejected=None):
+    """Canonical records from a response CSV in any historical layout, one row at a time.
+
+    ``rejected`` is passed on to ``canonicalize``.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield canonicalize(row, rejected)
+
+
+def backend_records(backend, chunk=1000, rejected=None):
+    """Canonical records from a backend, paged through ``read_range``."""
+    start = 0
+    while True:
+        rows = backend.read_range(start, start + chunk)
+        if not rows:
+            return
+        for row in rows:
+            yield canonicalize(row, rejected)
+        start += len(rows)
+
+
+# ---- Local SQLite Stores ----
+class LocalStore:
+    """Base for the local SQLite files (WAL mode) shared by threads and processes.
+
+    sqlite3 connections cannot be shared across threads, so each thread
+    gets its own, opened on first use in autocommit mode; ``_transaction``
+    groups statements explicitly.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._conn().execute("PRAGMA journal_mode=WAL")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+class DerivedStore(LocalStore):
+    """A local store derived from the live responses, folding each one in exactly once.
+
+    Responses are tracked by backend id: ``last_id`` in ``meta`` is the id
+    up to which every response has been folded in, and ``folded`` holds the
+    ids above it that were added live, which arrive out of id order when
+    several sessions submit at once. Both change in the transaction that
+    folds the data, so a catch-up running in another process (a bulk
+    import, say) neither counts a response twice nor skips one.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS folded (id INTEGER PRIMARY KEY)")
+        # Older files kept a count of backend rows instead; response ids start
+        # at 1 and rows are never deleted, so that count is the last id.
+        conn.execute("INSERT OR IGNORE INTO meta SELECT 'last_id', value FROM meta WHERE name = 'backend_rows'")
+        conn.execute("DELETE FROM meta WHERE name = 'backend_rows'")
+
+    def _meta(self, name, conn=None):
+        row = (conn or self._conn()).execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    @property
+    def watermark(self):
+        """Backend id up to which every response is folded in."""
+        return self._meta("last_id")
+
+    def _claim(self, conn, ids, advance_to=None):
+        """Within the folding transaction, flag which of ``ids`` are new and record them.
+
+        A live addition is remembered in ``folded`` until the ids below it
+        are in too; a catch-up batch moves ``last_id`` to ``advance_to``, the
+        last id it read.
+        """
+        last = self._meta("last_id", conn)
+        new = []
+        for row_id in ids:
+            if row_id <= last:
+                new.append(False)
+            elif advance_to is None:
+                new.append(conn.execute("INSERT OR IGNORE INTO folded VALUES (?)", (row_id,)).rowcount == 1)
+            else:
+                new.append(conn.execute("SELECT 1 FROM folded WHERE id = ?", (row_id,)).fetchone() is None)
+        if advance_to is None:
+            # Absorb the run of live ids just above last_id, so ``folded`` stays small.
+            advance_to = last
+            while conn.execute("DELETE FROM folded WHERE id = ?", (advance_to + 1,)).rowcount:
+                advance_to += 1
+        if advance_to > last:
+            conn.execute(
+                "INSERT INTO meta VALUES ('last_id', ?) ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+                (advance_to,),
+            )
+            conn.execute("DELETE FROM folded WHERE id <= ?", (advance_to,))
+        return new
+
+    def catch_up(self, backend, chunk=1000):
+        """Fold in what ``backend`` holds beyond the watermark; returns how many were new."""
+        added = 0
+        while True:
+            rows = backend.read_after(self.watermark, chunk)
+            if not rows:
+                return added
+            added += self._fold_rows(rows)
+
+    def _fold_rows(self, rows):
+        """Fold ``(id, submitted_at, row)`` tuples read from the backend."""
+        return self.add_many([canonicalize(row) for _, _, row in rows],
+                             ids=[row_id for row_id, _, _ in rows], advance_to=rows[-1][0])
+
+    def reset(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM meta")
+        conn.execute("DELETE FROM folded")
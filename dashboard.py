@@ -0,0 +1,113 @@
+import streamlit as st
+
+from analytics import CUBE_PATH, CUBE_QUESTIONS, DIMENSIONS, AggregateCube
+from export import FILTER_COLUMNS, FORMATS, PII_COLUMNS, backend_source, export
+from storage import SQLITE_PATH, SQLiteBackend
+from survey_schema import COLUMNS, QUESTIONS_BY_COLUMN
+from text_index import INDEX_PATH, TEXT_COLUMNS, TextIndex
+
+# ---- Streamlit Page Config ----
+st.set_page_config(page_title="WRVSL Survey Dashboard", layout="wide")
+
+# ---- Cube Connection (shared by all sessions) ----
+@st.cache_resource
+def get_cube():
+    return AggregateCube(CUBE_PATH)
+
+@st.cache_resource
+def get_text_index():
+    return TextIndex(INDEX_PATH)
+
+cube = get_cube()
+questions = {f"{q.label}  [{q.column}]": q for q in CUBE_QUESTIONS}
+
+# ---- Sidebar Controls ----
+st.sidebar.title("📊 Cross-tab")
+label = st.sidebar.selectbox("Question", list(questions))
+by = st.sidebar.multiselect("Group by", DIMENSIONS, default=["region"])
+q = questions[label]
+
+# ---- Sidebar Export ----
+def export_file(where, columns, fmt, redact):
+    """The extract as bytes, built only when Download is clicked; Streamlit serves it from memory."""
+    rows = backend_source(SQLiteBackend(SQLITE_PATH), where)
+    return b"".join(text.encode("utf-8") for text in export(rows, fmt, columns, redact))
+
+with st.sidebar.expander("⬇️ Export responses"):
+    where = {}
+    for column in FILTER_COLUMNS:
+        picked = st.multiselect(QUESTIONS_BY_COLUMN[column].label, QUESTIONS_BY_COLUMN[column].options,
+                                key=f"export_{column}")
+        if picked:
+            where[column] = picked
+    columns = st.multiselect("Columns (default: all)", COLUMNS, key="export_columns")
+    fmt = st.radio("Format", FORMATS, horizontal=True, key="export_format")
+    include_pii = st.checkbox(f"Include personal data ({', '.join(PII_COLUMNS)})", key="export_pii")
+    st.download_button(
+        "Download", lambda: export_file(where, columns or None, fmt, () if include_pii else PII_COLUMNS),
+        file_name=f"wrvsl_responses.{fmt}", mime="text/csv" if fmt == "csv" else "application/jsonl",
+    )
+
+# ---- Results ----
+st.title("🌍 WRVSL Survey Dashboard")
+st.metric("Responses", cube.total_responses())
+st.subheader(q.label)
+
+if q.dtype in ("ordinal", "list"):
+    import pandas as pd
+
+    rows = cube.crosstab(q.column, by)
+    if not rows:
+        st.info("No answers yet.")
+    else:
+        table = pd.DataFrame(rows)
+        if by:
+            pivot = table.pivot_table(index=by, columns="option", values="n", aggfunc="sum", fill_value=0)
+        else:
+            pivot = table.set_index("option")[["n"]].T
+        pivot = pivot[[o for o in q.options if o in pivot.columns]]
+        st.dataframe(pivot)
+        if pivot.index.nlevels > 1:
+            # st.bar_chart needs a flat index; label each bar with the full group.
+            pivot.index = pivot.index.map(lambda group: " / ".join(map(str, group)))
+        st.bar_chart(pivot)
+
+summary = cube.summary(q.column, by)
+if summary:
+    caption = {"ordinal": "mean option position (0 = first option)", "list": "mean options selected"}
+    st.markdown(f"**Answered & {caption.get(q.dtype, 'mean value')}**")
+    st.dataframe(summary)
+
+# ---- Free-Text Answers ----
+st.header("🔎 Free-text answers")
+text_index = get_text_index()
+fields = {"All questions": None}
+fields.update({QUESTIONS_BY_COLUMN[c].label: c for c in TEXT_COLUMNS})
+col1, col2, col3 = st.columns([2, 1, 1])
+with col1:
+    query = st.text_input("Search answers (all words must match)")
+with col2:
+    field = fields[st.selectbox("Question", list(fields))]
+with col3:
+    size = st.selectbox("Keyword length", (None, 1, 2, 3), format_func=lambda n: "Any" if n is None else f"{n} word(s)")
+
+if query:
+    hits = text_index.search(query, field=field)
+    st.caption(f"{len(hits)} matching answer(s)")
+    for hit in hits:
+        st.markdown(f"**{QUESTIONS_BY_COLUMN[hit['field']].label}** · {hit['region'] or 'No region'} · {hit['day']}")
+        st.write(hit["text"])
+
+keywords = text_index.keywords(field=field, size=size)
+if not keywords:
+    st.info("No free-text answers indexed yet.")
+else:
+    st.dataframe(keywords)
+    keyword = st.selectbox("Keyword trend", [k["gram"] for k in keywords])
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Answers by region**")
+        st.bar_chart({r["region"] or "No region": r["answers"] for r in text_index.breakdown(keyword, "region", field)})
+    with col2:
+        st.markdown("**Answers per day**")
+        st.line_chart({r["day"]: r["answers"] for r in text_index.breakdown(keyword, "day", field)})
@@ -0,0 +1,128 @@
+import csv
+import json
+import logging
+import sys
+from io import StringIO
+
+from common import backend_records, chunks, load_csv_records
+from survey_schema import COLUMNS, QUESTIONS_BY_COLUMN, is_missing
+
+logger = logging.getLogger(__name__)
+
+# ---- Export Configuration ----
+PII_COLUMNS = ("email",)
+REDACTED = "[redacted]"
+FILTER_COLUMNS = ("region", "org_type", "follow_up")
+FORMATS = ("csv", "jsonl")
+CHUNK_ROWS = 200   # rows serialized per yielded chunk
+
+
+# ---- Pipeline Stages ----
+def csv_source(paths, where=None):
+    """Canonical rows from CSV files in any layout, filtered as they are read."""
+    for path in paths:
+        yield from filter_rows(load_csv_records(path), where)
+
+
+def backend_source(backend, where=None, chunk=1000):
+    """Rows from a backend, pushing ``where`` down into it when it can scan."""
+    if hasattr(backend, "scan"):
+        yield from backend.scan(where)
+        return
+    yield from filter_rows(backend_records(backend, chunk), where)
+
+
+def filter_rows(rows, where=None):
+    """Keep rows whose value for each ``where`` column is one of the given values."""
+    if not where:
+        yield from rows
+        return
+    where = {column: set(values) for column, values in where.items()}
+    for row in rows:
+        if all((None if is_missing(row.get(c)) else row.get(c)) in values for c, values in where.items()):
+            yield row
+
+
+def project(rows, columns=None, redact=PII_COLUMNS):
+    """Reduce rows to ``columns`` (in that order), masking answered ``redact`` columns."""
+    columns = list(columns or COLUMNS)
+    masked = [c for c in columns if c in redact]
+    for row in rows:
+        out = {c: row.get(c) for c in columns}
+        for c in masked:
+            if not is_missing(out[c]):
+                out[c] = REDACTED
+        yield out
+
+
+def to_csv(rows, columns=None):
+    """Serialize rows as CSV text chunks, header first."""
+    columns = list(columns or COLUMNS)
+    buf = StringIO()
+    writer = csv.DictWriter(buf, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    yield buf.getvalue()
+    for chunk in chunks(rows, CHUNK_ROWS):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows({k: "" if is_missing(v) or v == [] else v for k, v in row.items()} for row in chunk)
+        yield buf.getvalue()
+
+
+def to_jsonl(rows, columns=None):
+    """Serialize rows as JSON Lines text chunks."""
+    for chunk in chunks(rows, CHUNK_ROWS):
+        yield "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in chunk)
+
+
+def export(rows, fmt="csv", columns=None, redact=PII_COLUMNS):
+    """Project, redact and serialize ``rows``; returns a generator of text chunks."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    columns = list(columns or COLUMNS)
+    unknown = [c for c in columns if c not in QUESTIONS_BY_COLUMN]
+    if unknown:
+        raise ValueError(f"unknown column(s): {', '.join(unknown)}")
+    serialize = to_csv if fmt == "csv" else to_jsonl
+    return serialize(project(rows, columns, redact), columns)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream a filtered extract of the survey responses.")
+    parser.add_argument("--db", help="SQLite response store to export from")
+    parser.add_argument("--csv", nargs="*", default=[], help="CSV files to export from, in any historical layout")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--columns", help="comma-separated canonical columns to include (default: all)")
+    parser.add_argument("--out", help="output file (default: stdout)")
+    parser.add_argument("--include-pii", action="store_true", help=f"do not redact {', '.join(PII_COLUMNS)}")
+    for column in FILTER_COLUMNS:
+        parser.add_argument(f"--{column.replace('_', '-')}", dest=column, action="append",
+                            help=f"keep only rows with this {column} (repeatable)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if not args.db and not args.csv:
+        from storage import SQLITE_PATH
+        args.db = SQLITE_PATH
+    where = {c: getattr(args, c) for c in FILTER_COLUMNS if getattr(args, c)}
+
+    def sources():
+        yield from csv_source(args.csv, where)
+        if args.db:
+            from storage import SQLiteBackend
+            yield from backend_source(SQLiteBackend(args.db), where)
+
+    columns = args.columns.split(",") if args.columns else None
+    unknown = [c for c in columns or () if c not in QUESTIONS_BY_COLUMN]
+    if unknown:
+        parser.error(f"unknown column(s): {', '.join(unknown)}")
+    out = open(args.out, "w", newline="", encoding="utf-8") if args.out else sys.stdout
+    try:
+        for text in export(sources(), args.format, columns, redact=() if args.include_pii else PII_COLUMNS):
+            out.write(text)
+            out.flush()
+    finally:
+        if args.out:
+            out.close()
@@ -0,0 +1,135 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from github import Auth, Github
+
+import metrics
+from storage import REPO_NAME
+
+logger = logging.getLogger(__name__)
+
+# ---- Client Configuration ----
+POOL_SIZE = 10           # keep-alive connections shared by all sessions
+BLOB_CACHE_SIZE = 64     # git blobs are immutable, so cached copies never go stale
+WRITE_RESERVE = 100      # requests kept back for reads; writes are deferred below this
+_COMMIT_SHA = re.compile(r"^[0-9a-f]{40}$")
+
+GITHUB_CALL_SECONDS = metrics.histogram("wrvsl_github_call_seconds", "GitHub API call latency by method.")
+GITHUB_CACHE_HITS = metrics.counter("wrvsl_github_cache_hits_total", "Reads served without a billable request.")
+
+
+# ---- Cached Repository Proxy ----
+class CachedRepo:
+    """Wraps a PyGithub ``Repository`` to avoid spending quota on repeat reads.
+
+    ``get_contents`` for a moving ref (a branch, or the default branch) is
+    revalidated with If-None-Match, so an unchanged file costs a 304 that
+    does not count against the rate limit. Reads pinned to a commit sha and
+    ``get_git_blob`` are content-addressed and served from memory. Every
+    other attribute is delegated to the wrapped repository.
+    """
+
+    def __init__(self, repo):
+        self._repo = repo
+        self._lock = threading.Lock()
+        self._contents = {}
+        self._blobs = OrderedDict()
+        self.not_modified = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._repo, name)
+        if not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            with GITHUB_CALL_SECONDS.time(method=name):
+                return attr(*args, **kwargs)
+
+        return timed
+
+    def get_contents(self, path, ref=None):
+        key = (path, ref)
+        with self._lock:
+            cached = self._contents.get(key)
+        if cached is not None:
+            if ref is not None and _COMMIT_SHA.match(ref):
+                GITHUB_CACHE_HITS.inc(method="get_contents")
+                return cached
+            with GITHUB_CALL_SECONDS.time(method="get_contents_conditional"):
+                modified = cached.update()
+            if not modified:
+                self.not_modified += 1
+                GITHUB_CACHE_HITS.inc(method="get_contents_304")
+            return cached
+        with GITHUB_CALL_SECONDS.time(method="get_contents"):
+            if ref is None:
+                file = self._repo.get_contents(path)
+            else:
+                file = self._repo.get_contents(path, ref=ref)
+        with self._lock:
+            self._contents[key] = file
+            if ref is not None and _COMMIT_SHA.match(ref):
+                # Commit-pinned entries are only useful while that commit is the head.
+                for stale in [k for k in self._contents
+                              if k[0] == path and k[1] not in (None, ref) and _COMMIT_SHA.match(k[1])]:
+                    self._contents.pop(stale)
+        return file
+
+    def get_git_blob(self, sha):
+        with self._lock:
+            blob = self._blobs.get(sha)
+            if blob is not None:
+                self._blobs.move_to_end(sha)
+                GITHUB_CACHE_HITS.inc(method="get_git_blob")
+                return blob
+        with GITHUB_CALL_SECONDS.time(method="get_git_blob"):
+            blob = self._repo.get_git_blob(sha)
+        with self._lock:
+            self._blobs[sha] = blob
+            while len(self._blobs) > BLOB_CACHE_SIZE:
+                self._blobs.popitem(last=False)
+        return blob
+
+
+# ---- Shared GitHub Client ----
+class GitHubClient:
+    """Long-lived GitHub client meant to be created once per process.
+
+    Holds one PyGithub instance with a keep-alive connection pool, caches
+    the repository object, and tracks the remaining rate-limit quota from
+    response headers so writers can defer before hitting the limit.
+    """
+
+    def __init__(self, token, repo_name=REPO_NAME, pool_size=POOL_SIZE, write_reserve=WRITE_RESERVE):
+        self.github = Github(auth=Auth.Token(token), pool_size=pool_size)
+        self.repo_name = repo_name
+        self.write_reserve = write_reserve
+        self._repo = None
+        self._lock = threading.Lock()
+
+    def get_repo(self):
+        with self._lock:
+            if self._repo is None:
+                self._repo = CachedRepo(self.github.get_repo(self.repo_name))
+            return self._repo
+
+    def rate_limit(self):
+        """``{"remaining", "limit", "reset"}`` as of the last API response."""
+        remaining, limit = self.github.rate_limiting
+        return {"remaining": remaining, "limit": limit, "reset": self.github.rate_limiting_resettime}
+
+    def write_delay(self, needed=0):
+        """Seconds to hold off writing so the reserve is kept; 0 when writes may proceed.
+
+        ``needed`` is how many requests the caller is about to make.
+        """
+        quota = self.rate_limit()
+        if quota["remaining"] - needed > self.write_reserve:
+            return 0.0
+        delay = max(quota["reset"] - time.time(), 0.0) + 1.0
+        logger.warning("GitHub quota low (%d/%d left), deferring writes for %.0fs",
+                       quota["remaining"], quota["limit"], delay)
+        return delay
@@ -0,0 +1,233 @@
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# ---- Metrics Configuration ----
+METRICS_PORT = os.environ.get("WRVSL_METRICS_PORT")          # serve /metrics on this port if set
+METRICS_FILE = os.environ.get("WRVSL_METRICS_FILE")          # ...and/or rewrite this file periodically
+METRICS_FILE_INTERVAL = 15.0
+PROFILE_SAMPLE_RATE = float(os.environ.get("WRVSL_PROFILE_SAMPLE_RATE", 0.0))  # fraction of reruns profiled
+PROFILE_SLOW_SECONDS = float(os.environ.get("WRVSL_PROFILE_SLOW_SECONDS", 0.5))
+PROFILE_DIR = os.environ.get("WRVSL_PROFILE_DIR", "profiles")
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+# ---- Metric Types ----
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name, self.help = name, help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """A value that can go up and down, or be read from ``fn`` at export time."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, fn=None):
+        super().__init__(name, help)
+        self.fn = fn
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def samples(self):
+        if self.fn is not None:
+            try:
+                value = self.fn()
+            except Exception:
+                logger.debug("Gauge %s could not be read", self.name, exc_info=True)
+                return []
+            return [] if value is None else [(self.name, (), value)]
+        return super().samples()
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.buckets = name, help, tuple(buckets)
+        self._values = {}   # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, state in self._values.items():
+                for bound, count in zip(self.buckets, state):
+                    out.append((f"{self.name}_bucket", key + (("le", repr(bound)),), count))
+                out.append((f"{self.name}_bucket", key + (("le", "+Inf"),), state[-1]))
+                out.append((f"{self.name}_sum", key, state[-2]))
+                out.append((f"{self.name}_count", key, state[-1]))
+        return out
+
+
+def _register(cls, name, *args, **kwargs):
+    # Streamlit re-executes the app script, so registration must be idempotent.
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+        return metric
+
+
+def counter(name, help):
+    return _register(Counter, name, help)
+
+
+def gauge(name, help, fn=None):
+    metric = _register(Gauge, name, help)
+    if fn is not None:
+        metric.fn = fn
+    return metric
+
+
+def histogram(name, help, buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, help, buckets)
+
+
+# ---- Prometheus Text Export ----
+def render():
+    lines = []
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, key, value in metric.samples():
+            lines.append(f"{name}{_format_labels(key)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port):
+    """Expose ``/metrics`` on ``port`` from a daemon thread (the sidecar endpoint)."""
+    server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="wrvsl-metrics", daemon=True).start()
+    return server
+
+
+def write_file(path, interval=METRICS_FILE_INTERVAL):
+    """Rewrite ``path`` with the current metrics every ``interval`` seconds."""
+    def run():
+        while True:
+            tmp = path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(render())
+            os.replace(tmp, path)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="wrvsl-metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_exporters():
+    """Start whichever exporters are configured through the environment."""
+    if METRICS_PORT:
+        serve(METRICS_PORT)
+        logger.info("Serving metrics on :%s/metrics", METRICS_PORT)
+    if METRICS_FILE:
+        write_file(METRICS_FILE)
+        logger.info("Writing metrics to %s", METRICS_FILE)
+
+
+# ---- Script Rerun Timing & Sampled Profiling ----
+RERUN_SECONDS = histogram("wrvsl_rerun_seconds", "Full Streamlit script rerun time.")
+SLOW_RERUNS = counter("wrvsl_slow_reruns_total", "Reruns slower than the profiling threshold.")
+
+
+def rerun_started():
+    """Call at the top of the script; pass the result to ``rerun_finished``."""
+    profiler = None
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            profiler = None   # another rerun is being profiled (Python 3.12+ allows one profiler)
+    return time.perf_counter(), profiler
+
+
+def rerun_finished(token, **labels):
+    """Call in a ``finally`` so reruns ended by st.stop(), st.rerun() or an error are counted."""
+    started, profiler = token
+    elapsed = time.perf_counter() - started
+    if profiler is not None:
+        profiler.disable()
+    RERUN_SECONDS.observe(elapsed, **labels)
+    if elapsed >= PROFILE_SLOW_SECONDS:
+        SLOW_RERUNS.inc(**labels)
+        if profiler is not None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            path = os.path.join(PROFILE_DIR, f"rerun-{time.strftime('%Y%m%d-%H%M%S')}-{int(elapsed * 1000)}ms.prof")
+            profiler.dump_stats(path)
+            logger.info("Slow rerun (%.0f ms) profiled to %s", elapsed * 1000, path)
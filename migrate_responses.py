@@ -0,0 +1,100 @@
+import csv
+import hashlib
+import logging
+import os
+import sys
+from collections import Counter
+
+from common import chunks
+from survey_schema import COLUMNS, COLUMN_ALIASES, canonicalize, is_missing
+
+logger = logging.getLogger(__name__)
+
+# ---- Migration Configuration ----
+WRITE_CHUNK_ROWS = 1000
+
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+
+# ---- Streaming Migration ----
+def _cell(value):
+    if is_missing(value) or value == []:
+        return ""
+    return str(value)
+
+
+def _fingerprint(cells):
+    return hashlib.blake2b("\x1f".join(cells).encode("utf-8"), digest_size=16).digest()
+
+
+def migrate_rows(rows, stats, seen=None):
+    """Yield canonical CSV rows (lists in ``COLUMNS`` order) for ``rows``.
+
+    Every historical layout is mapped through ``canonicalize``; rows with no
+    answers at all and exact re-submissions of an earlier row are dropped.
+    Only a 16-byte fingerprint per distinct row is kept, so memory does not
+    depend on row width or on how many columns the input has accumulated.
+    """
+    seen = set() if seen is None else seen
+    for row in rows:
+        stats["read"] += 1
+        cells = [_cell(v) for v in map(canonicalize(row, stats.get("rejected")).get, COLUMNS)]
+        if not any(cells):
+            stats["empty"] += 1
+            continue
+        key = _fingerprint(cells)
+        if key in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(key)
+        stats["written"] += 1
+        yield cells
+
+
+def migrate_files(paths, out_path):
+    """Stream ``paths`` into one compacted CSV with the canonical header.
+
+    The output is written to a temporary file and swapped in atomically, so
+    ``out_path`` may also be one of the inputs.
+    """
+    stats = {"read": 0, "empty": 0, "duplicates": 0, "written": 0, "dropped_columns": set(),
+             "rejected": Counter()}
+    seen = set()
+    tmp = out_path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(COLUMNS)
+        for path in paths:
+            with open(path, newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                stats["dropped_columns"].update(c for c in reader.fieldnames or () if c not in COLUMN_ALIASES)
+                for chunk in chunks(migrate_rows(reader, stats, seen), WRITE_CHUNK_ROWS):
+                    writer.writerows(chunk)
+    os.replace(tmp, out_path)
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Migrate response CSVs in any historical layout to the canonical schema, "
+                    "dropping empty rows and duplicate submissions."
+    )
+    parser.add_argument("csv", nargs="+", help="input CSV files, merged in the order given")
+    parser.add_argument("--out", help="output CSV (default: rewrite the single input in place)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.out is None and len(args.csv) != 1:
+        parser.error("--out is required when migrating more than one file")
+    stats = migrate_files(args.csv, args.out or args.csv[0])
+    logger.info(
+        "Read %d row(s); wrote %d, dropped %d duplicate(s) and %d empty row(s)",
+        stats["read"], stats["written"], stats["duplicates"], stats["empty"],
+    )
+    for column, count in stats["rejected"].most_common():
+        logger.warning("%s: %d value(s) that are not valid answers were left empty", column, count)
+    if stats["dropped_columns"]:
+        logger.warning("Columns with no matching question were dropped: %s",
+                       ", ".join(sorted(stats["dropped_columns"])))
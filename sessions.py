@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections.abc import MutableMapping
+
+import metrics
+from common import LocalStore
+from survey_schema import CHOICE_KINDS, QUESTIONS, QUESTIONS_BY_KEY, SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
+
+# ---- Session Configuration ----
+DRAFTS_PATH = "drafts.db"
+IDLE_TIMEOUT = float(os.environ.get("WRVSL_IDLE_TIMEOUT", 30 * 60))        # evict sessions idle this long (s)
+DRAFT_MAX_AGE = float(os.environ.get("WRVSL_DRAFT_MAX_AGE", 30 * 86400))   # forget drafts not resumed by then
+SWEEP_INTERVAL = 60.0
+
+EVICTED_SESSIONS = metrics.counter("wrvsl_evicted_sessions_total", "Idle sessions whose answers were spilled.")
+RESUMED_SESSIONS = metrics.counter("wrvsl_resumed_sessions_total", "Drafts restored into a session.")
+
+
+def new_token():
+    return secrets.token_urlsafe(9)
+
+
+# ---- Compact Answer Record ----
+class CompactResponses(MutableMapping):
+    """The answers of one session, keyed by widget key like the old dict.
+
+    One slot per question holds ``Question.encode``'s compact form: option
+    index for choices, bitmask for multi-selects, int for sliders, str for
+    text. Option indexes are small ints, which CPython shares, so a choice
+    answer costs one pointer instead of a duplicated option string and a
+    dict entry. Reading a key decodes back to what the widget produced.
+    """
+
+    __slots__ = tuple(q.key for q in QUESTIONS) + ("evicted",)
+
+    def __init__(self, codes=None):
+        self.evicted = False
+        if codes:
+            self.load_codes(codes)
+
+    def __getitem__(self, key):
+        q = QUESTIONS_BY_KEY.get(key)
+        if q is None:
+            raise KeyError(key)
+        try:
+            code = getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+        if q.kind in CHOICE_KINDS and not isinstance(code, int):
+            return code   # a value outside the options, kept as is
+        return q.decode(code)
+
+    def __setitem__(self, key, value):
+        q = QUESTIONS_BY_KEY[key]
+        code = q.encode(value)
+        if code is None and value is not None and q.kind in CHOICE_KINDS:
+            code = value
+        setattr(self, key, code)
+
+    def __delitem__(self, key):
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        for q in QUESTIONS:
+            if hasattr(self, q.key):
+                yield q.key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"CompactResponses({dict(self)!r})"
+
+    def codes(self):
+        """The raw encoded answers, for spilling as JSON."""
+        return {key: getattr(self, key) for key in self}
+
+    def load_codes(self, codes):
+        for key, code in codes.items():
+            if key in QUESTIONS_BY_KEY and not hasattr(self, key):
+                setattr(self, key, code)
+
+
+# ---- Local Draft Store ----
+class DraftStore(LocalStore):
+    """Unfinished surveys by resume token, in SQLite (WAL) shared by all sessions.
+
+    Drafts hold encoded answers, so they are only valid for the schema
+    version that wrote them; older ones are ignored.
+    """
+
+    def __init__(self, path=DRAFTS_PATH):
+        super().__init__(path)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS drafts (token TEXT PRIMARY KEY, updated_at REAL NOT NULL, "
+            "schema_version INTEGER NOT NULL, section INTEGER NOT NULL, data TEXT NOT NULL)"
+        )
+
+    def save(self, token, section, codes):
+        self._conn().execute(
+            "INSERT INTO drafts VALUES (?, ?, ?, ?, ?) ON CONFLICT(token) DO UPDATE SET "
+            "updated_at = excluded.updated_at, schema_version = excluded.schema_version, "
+            "section = excluded.section, data = excluded.data",
+            (token, time.time(), SCHEMA_VERSION, section, json.dumps(codes, separators=(",", ":"))),
+        )
+
+    def load(self, token):
+        """Return ``(section, codes)`` for ``token``, or None."""
+        row = self._conn().execute(
+            "SELECT section, data FROM drafts WHERE token = ? AND schema_version = ?", (token, SCHEMA_VERSION)
+        ).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def delete(self, token):
+        self._conn().execute("DELETE FROM drafts WHERE token = ?", (token,))
+
+    def prune(self, max_age=DRAFT_MAX_AGE):
+        return self._conn().execute(
+            "DELETE FROM drafts WHERE updated_at < ?", (time.time() - max_age,)
+        ).rowcount
+
+
+# ---- Idle Session Eviction ----
+class SessionRegistry:
+    """Tracks live sessions and spills the answers of idle ones to the draft store.
+
+    Every rerun ``touch``es its session. A sweeper thread saves sessions
+    idle for ``idle_timeout`` as drafts and empties their answer records in
+    place, which frees the memory even though Streamlit still holds the
+    session. The next ``touch`` of an evicted session reloads its draft.
+    """
+
+    def __init__(self, store, idle_timeout=IDLE_TIMEOUT, sweep_interval=SWEEP_INTERVAL):
+        self.store = store
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self._sessions = {}   # token -> [last_seen, responses, section]
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def active(self):
+        return len(self._sessions)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="wrvsl-sessions", daemon=True)
+            self._thread.start()
+        return self
+
+    def _reload(self, token, responses):
+        # Call with the lock held.
+        if responses.evicted:
+            draft = self.store.load(token)
+            if draft is not None:
+                responses.load_codes(draft[1])   # answers given since eviction take precedence
+                RESUMED_SESSIONS.inc()
+            responses.evicted = False
+
+    def touch(self, token, responses, section):
+        """Record activity, first reloading the draft of a session that was evicted."""
+        with self._lock:
+            self._reload(token, responses)
+            self._sessions[token] = [time.monotonic(), responses, section]
+
+    def resume(self, token, responses):
+        """Load the draft saved under ``token`` into ``responses``; returns its section or None."""
+        draft = self.store.load(token)
+        if draft is None:
+            return None
+        responses.load_codes(draft[1])
+        RESUMED_SESSIONS.inc()
+        return draft[0]
+
+    def save(self, token, responses, section):
+        """Save the draft; an evicted session is reloaded first so its draft is not overwritten by an empty one.
+
+        Navigation callbacks run before the script body, and so before ``touch``.
+        """
+        with self._lock:
+            self._reload(token, responses)
+        self.store.save(token, section, responses.codes())
+
+    def finish(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+        self.store.delete(token)
+
+    def evict_idle(self):
+        # Drafts are written outside the lock so reruns touching other sessions never wait on SQLite.
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [(token, entry) for token, entry in self._sessions.items() if entry[0] < cutoff]
+            for token, _ in idle:
+                del self._sessions[token]
+        for token, (_, responses, section) in idle:
+            self.store.save(token, section, responses.codes())
+        evicted = 0
+        with self._lock:
+            for token, (_, responses, _) in idle:
+                if token in self._sessions:
+                    continue   # touched again while its draft was saved; keep it in memory
+                responses.evicted = True
+                responses.clear()
+                evicted += 1
+        if evicted:
+            EVICTED_SESSIONS.inc(evicted)
+            logger.info("Spilled %d idle session(s) to drafts", evicted)
+        return evicted
+
+    def _run(self):
+        last_prune = 0.0
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.evict_idle()
+                if time.monotonic() - last_prune > 3600:
+                    self.store.prune()
+                    last_prune = time.monotonic()
+            except Exception:
+                logger.exception("Session sweep failed")
@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+from collections import Counter
+
+import pyarrow as pa
+
+from common import backend_records, chunks, load_csv_records
+from survey_schema import QUESTIONS, SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
+
+# ---- Snapshot Configuration ----
+SNAPSHOT_PATH = "responses.arrow"
+BATCH_ROWS = 5000
+
+
+# ---- Arrow Schema Generated from the Survey Schema ----
+def _arrow_type(q):
+    if q.dtype in ("ordinal", "category"):
+        return pa.dictionary(pa.int8(), pa.string(), ordered=q.ordinal)
+    if q.dtype == "list":
+        return pa.list_(pa.dictionary(pa.int8(), pa.string()))
+    if q.dtype == "int":
+        return pa.uint8() if 0 <= q.min_value and q.max_value <= 255 else pa.int32()
+    return pa.string()
+
+
+def arrow_schema():
+    fields = []
+    for q in QUESTIONS:
+        metadata = {"key": q.key, "label": q.label, "dtype": q.dtype}
+        if q.options:
+            metadata["options"] = json.dumps(list(q.options))
+        fields.append(pa.field(q.column, _arrow_type(q), metadata=metadata))
+    return pa.schema(fields, metadata={"schema_version": str(SCHEMA_VERSION)})
+
+
+ARROW_SCHEMA = arrow_schema()
+_DICTIONARIES = {q.column: pa.array(list(q.options), pa.string()) for q in QUESTIONS if q.options}
+
+
+# ---- Record Batches ----
+def _column(q, values, rejected):
+    if q.dtype in ("ordinal", "category"):
+        codes = []
+        for value in values:
+            code = q.encode(value) if value is not None else None
+            if code is None and value is not None:
+                rejected[q.column] += 1
+            codes.append(code)
+        return pa.DictionaryArray.from_arrays(
+            pa.array(codes, pa.int8()), _DICTIONARIES[q.column], ordered=q.ordinal
+        )
+    if q.dtype == "list":
+        offsets, codes = [0], []
+        for value in values:
+            for option in value or ():
+                if option not in q.option_set:
+                    rejected[q.column] += 1
+                    continue
+                codes.append(q.options.index(option))
+            offsets.append(len(codes))
+        items = pa.DictionaryArray.from_arrays(pa.array(codes, pa.int8()), _DICTIONARIES[q.column])
+        return pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), items)
+    if q.kind == "slider":
+        checked = []
+        for value in values:
+            if value is not None and not q.min_value <= value <= q.max_value:
+                rejected[q.column] += 1
+                value = None
+            checked.append(value)
+        values = checked
+    return pa.array(values, ARROW_SCHEMA.field(q.column).type)
+
+
+def records_to_batch(records, rejected=None):
+    """Build one typed ``RecordBatch`` from canonical records."""
+    rejected = rejected if rejected is not None else Counter()
+    columns = [_column(q, [r.get(q.column) for r in records], rejected) for q in QUESTIONS]
+    return pa.RecordBatch.from_arrays(columns, schema=ARROW_SCHEMA)
+
+
+# ---- Compaction ----
+def write_snapshot(records, path=SNAPSHOT_PATH, fmt="arrow", batch_rows=BATCH_ROWS, rejected=None):
+    """Stream canonical records into a typed snapshot, one batch at a time.
+
+    ``fmt="arrow"`` writes an uncompressed Arrow IPC file that readers can
+    memory-map; ``fmt="parquet"`` writes a compressed Parquet file for
+    sharing. The file is written next to ``path`` and swapped in atomically.
+    Returns ``(rows, rejected)`` where ``rejected`` counts values per column
+    that were not one of the allowed options (or, for sliders, in range) and
+    were left null; pass a ``Counter`` to add to one shared with the readers.
+    """
+    rejected = Counter() if rejected is None else rejected
+    rows = 0
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(tmp, ARROW_SCHEMA, compression="zstd")
+        write = writer.write_batch
+    else:
+        writer = pa.ipc.new_file(tmp, ARROW_SCHEMA)
+        write = writer.write_batch
+    try:
+        for chunk in chunks(records, batch_rows):
+            write(records_to_batch(chunk, rejected))
+            rows += len(chunk)
+    finally:
+        writer.close()
+    os.replace(tmp, path)
+    return rows, rejected
+
+
+# ---- Reading ----
+def load_snapshot(path=SNAPSHOT_PATH):
+    """Return the snapshot as an Arrow ``Table``.
+
+    Arrow IPC files are memory-mapped, so loading is near-instant and the
+    data is paged in by the OS only as columns are touched.
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+def to_pandas(table):
+    """Convert to pandas keeping option columns categorical and sliders as nullable small ints."""
+    import pandas as pd
+
+    mapping = {pa.uint8(): pd.UInt8Dtype(), pa.int32(): pd.Int32Dtype()}
+    return table.to_pandas(types_mapper=mapping.get)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compact responses into a typed columnar snapshot.")
+    parser.add_argument("--db", help="SQLite response store to include")
+    parser.add_argument("--csv", nargs="*", default=[], help="CSV exports to include, in any historical layout")
+    parser.add_argument("--out", default=SNAPSHOT_PATH)
+    parser.add_argument("--format", choices=("arrow", "parquet"), default=None,
+                        help="defaults to the --out extension (.parquet or .arrow)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    rejected = Counter()
+
+    def sources():
+        for path in args.csv:
+            yield from load_csv_records(path, rejected)
+        if args.db:
+            from storage import SQLiteBackend
+            yield from backend_records(SQLiteBackend(args.db), BATCH_ROWS, rejected)
+
+    fmt = args.format or ("parquet" if args.out.endswith(".parquet") else "arrow")
+    rows, rejected = write_snapshot(sources(), args.out, fmt, rejected=rejected)
+    logger.info("Wrote %d response(s) to %s", rows, args.out)
+    for column, count in rejected.most_common():
+        logger.warning("%s: %d value(s) that are not valid answers were left empty", column, count)
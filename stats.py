@@ -0,0 +1,224 @@
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from survey_schema import QUESTIONS_BY_COLUMN
+
+logger = logging.getLogger(__name__)
+
+# ---- Statistics Configuration ----
+METRICS = {                       # slider -> the question saying where its figure comes from
+    "primary_crash_reduction": "safety_source",
+    "secondary_crash_reduction": "safety_source",
+    "speed_compliance": "speed_source",
+}
+GROUPINGS = ("region", "control_logic", "source")
+SOURCE = "source"                 # grouping placeholder for the metric's own source column
+RESAMPLES = 5000
+CONFIDENCE = 0.95
+MAX_BLOCK_CELLS = 2_000_000       # resample in blocks of at most this many values
+STATS_CACHE_DIR = ".stats_cache"
+ESTIMATORS_VERSION = 2            # bump when results change, so cached ones are recomputed
+
+
+# ---- Column Arrays ----
+def arrays_from_table(table):
+    """Extract metric values and group codes from a snapshot table as NumPy arrays.
+
+    Sliders become float64 with NaN for skipped answers; option columns
+    become their int8 option index with -1 for missing.
+    """
+    arrays = {}
+    for metric, source in METRICS.items():
+        arrays[metric] = table.column(metric).to_numpy().astype(np.float64)
+        for column in (source, "region", "control_logic"):
+            if column not in arrays:
+                indices = table.column(column).combine_chunks().indices
+                arrays[column] = indices.fill_null(-1).to_numpy().astype(np.int8)
+    return arrays
+
+
+def dataset_version(arrays):
+    """Content hash of the columns the statistics read; changes whenever any answer does."""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(arrays):
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()
+
+
+def balance_weights(codes):
+    """Per-row weights that give every observed group the same total weight."""
+    weights = np.zeros(len(codes))
+    observed = codes >= 0
+    _, inverse, counts = np.unique(codes[observed], return_inverse=True, return_counts=True)
+    weights[observed] = 1.0 / counts[inverse]
+    return weights * (observed.sum() / max(weights.sum(), 1e-12))
+
+
+# ---- Vectorized Estimators ----
+def weighted_mean(values, weights, axis=-1):
+    return (values * weights).sum(axis) / weights.sum(axis)
+
+
+def _crossing(cumulative, axis):
+    # First positions where the cumulative weight reaches, and passes, half
+    # the total. They differ only when the weight splits exactly in two (as
+    # with an even number of equal weights), and the median is then midway.
+    half = cumulative.take([-1], axis) / 2.0
+    slack = half * 1e-9
+    last = cumulative.shape[axis] - 1
+    lower = np.minimum((cumulative < half - slack).sum(axis), last)
+    upper = np.minimum((cumulative <= half + slack).sum(axis), last)
+    return lower, upper
+
+
+def weighted_median(values, weights, axis=-1):
+    order = np.argsort(values, axis=axis)
+    values = np.take_along_axis(values, order, axis)
+    cumulative = np.cumsum(np.take_along_axis(weights, order, axis), axis)
+    lower, upper = _crossing(cumulative, axis)
+    at = lambda position: np.take_along_axis(values, np.expand_dims(position, axis), axis).squeeze(axis)
+    return (at(lower) + at(upper)) / 2.0
+
+
+def _histogram_medians(codes, weights, bins):
+    # Sliders are small integers, so a weighted histogram per resample (one
+    # bincount) replaces the sort a general weighted median needs.
+    rows = np.arange(codes.shape[0])[:, None] * bins
+    hist = np.bincount((rows + codes).ravel(), weights.ravel(), minlength=codes.shape[0] * bins)
+    lower, upper = _crossing(hist.reshape(-1, bins).cumsum(1), 1)
+    return (lower + upper) / 2.0
+
+
+def bootstrap(values, weights, resamples=RESAMPLES, confidence=CONFIDENCE, seed=0):
+    """Point estimates and percentile bootstrap intervals for the weighted mean and median.
+
+    All resamples are drawn as index matrices and reduced along an axis, in
+    blocks of ``MAX_BLOCK_CELLS`` so memory stays bounded for large groups.
+    """
+    n = len(values)
+    rng = np.random.default_rng(seed)
+    block = max(MAX_BLOCK_CELLS // n, 1)
+    low = values.min()
+    integral = np.array_equal(values, np.round(values))
+    codes = (values - low).astype(np.intp) if integral else None
+    bins = int(codes.max()) + 1 if integral else 0
+    means, medians = np.empty(resamples), np.empty(resamples)
+    for start in range(0, resamples, block):
+        stop = min(start + block, resamples)
+        idx = rng.integers(0, n, size=(stop - start, n))
+        sample_values, sample_weights = values[idx], weights[idx]
+        means[start:stop] = weighted_mean(sample_values, sample_weights)
+        if integral:
+            medians[start:stop] = low + _histogram_medians(codes[idx], sample_weights, bins)
+        else:
+            medians[start:stop] = weighted_median(sample_values, sample_weights)
+    tail = (1.0 - confidence) / 2.0 * 100
+    return {
+        "n": n,
+        "weight": float(weights.sum()),
+        "mean": float(weighted_mean(values, weights)),
+        "median": float(weighted_median(values, weights)),
+        "mean_ci": [float(v) for v in np.nanpercentile(means, [tail, 100 - tail])],
+        "median_ci": [float(v) for v in np.nanpercentile(medians, [tail, 100 - tail])],
+    }
+
+
+def _run_task(task):
+    key, values, weights, resamples, confidence, seed = task
+    return key, bootstrap(values, weights, resamples, confidence, seed)
+
+
+# ---- Grouped Report ----
+def _tasks(arrays, weights, groupings, resamples, confidence, seed):
+    seeds = np.random.SeedSequence(seed)
+    for metric, source in METRICS.items():
+        values = arrays[metric]
+        answered = ~np.isnan(values) & (weights > 0)
+        for by in (None,) + tuple(groupings):
+            column = source if by == SOURCE else by
+            codes = arrays[column] if column else np.zeros(len(values), dtype=np.int8)
+            for code in np.unique(codes[answered]):
+                if code < 0:
+                    continue
+                mask = answered & (codes == code)
+                label = QUESTIONS_BY_COLUMN[column].options[code] if column else "All"
+                yield ((metric, by or "all", label), values[mask], weights[mask], resamples, confidence,
+                       seeds.spawn(1)[0])
+
+
+def compute(arrays, groupings=GROUPINGS, weights=None, resamples=RESAMPLES, confidence=CONFIDENCE,
+            seed=0, workers=None):
+    """Bootstrap every metric overall and within each group of ``groupings``.
+
+    Groups are independent, so they are spread over a process pool of
+    ``workers`` (``0`` runs everything in this process). Returns a list of
+    dicts with ``metric``, ``by``, ``group`` and the ``bootstrap`` fields.
+    """
+    n = len(next(iter(arrays.values())))
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64)
+    tasks = list(_tasks(arrays, weights, groupings, resamples, confidence, seed))
+    if workers == 0 or len(tasks) < 2:
+        results = map(_run_task, tasks)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_task, tasks))
+    return [dict(metric=metric, by=by, group=group, **stats) for (metric, by, group), stats in results]
+
+
+def cached_compute(arrays, cache_dir=STATS_CACHE_DIR, balance=None, **kwargs):
+    """``compute`` with results cached on disk per dataset version and parameters.
+
+    ``balance`` names an option column to reweight by (see ``balance_weights``).
+    """
+    params = dict(kwargs, balance=balance)
+    params.pop("workers", None)
+    key = hashlib.blake2b(
+        json.dumps([ESTIMATORS_VERSION, dataset_version(arrays), params], sort_keys=True, default=list).encode(), digest_size=16
+    ).hexdigest()
+    path = os.path.join(cache_dir, f"{key}.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    weights = balance_weights(arrays[balance]) if balance else None
+    results = compute(arrays, weights=weights, **kwargs)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(results, f)
+    os.replace(tmp, path)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from snapshot import SNAPSHOT_PATH, load_snapshot
+
+    parser = argparse.ArgumentParser(description="Bootstrap confidence intervals for the survey's key sliders.")
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH, help="typed snapshot written by snapshot.py")
+    parser.add_argument("--resamples", type=int, default=RESAMPLES)
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    parser.add_argument("--balance", choices=("region", "control_logic"), default=None,
+                        help="weight responses so every group of this column counts equally")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (0 = run in-process)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    arrays = arrays_from_table(load_snapshot(args.snapshot))
+    started = time.perf_counter()
+    results = cached_compute(arrays, balance=args.balance, resamples=args.resamples,
+                             confidence=args.confidence, seed=args.seed, workers=args.workers)
+    logger.info("%d group(s) in %.2fs", len(results), time.perf_counter() - started)
+    print(f"{'metric':<28}{'by':<15}{'group':<45}{'n':>5}{'mean':>8}{'CI':>17}{'median':>8}{'CI':>17}")
+    for r in results:
+        print(f"{r['metric']:<28}{r['by']:<15}{r['group'][:44]:<45}{r['n']:>5}{r['mean']:>8.1f}"
+              f"{'[{:.1f}, {:.1f}]'.format(*r['mean_ci']):>17}{r['median']:>8.1f}"
+              f"{'[{:.1f}, {:.1f}]'.format(*r['median_ci']):>17}")
@@ -0,0 +1,700 @@
+import base64
+import csv
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from io import StringIO
+
+from github import GithubException, InputGitTreeElement, RateLimitExceededException
+
+import metrics
+from common import LocalStore
+from survey_schema import COLUMNS, SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
+
+# ---- Journal / Flush Configuration ----
+REPO_NAME = "abdhulkhadhir/WISE_Questionnaire"
+JOURNAL_DIR = "journal"
+SQLITE_PATH = "responses.db"
+FLUSH_MAX_ROWS = int(os.environ.get("WRVSL_FLUSH_MAX_ROWS", 25))       # flush once this many are pending
+FLUSH_MAX_AGE = float(os.environ.get("WRVSL_FLUSH_MAX_AGE", 60.0))     # ...or the oldest is this old (s)
+FLUSH_POLL_INTERVAL = float(os.environ.get("WRVSL_FLUSH_POLL", 5.0))
+COMMIT_RETRIES = 5
+
+# ---- Partition Layout ----
+PARTITION_ROOT = "responses"
+MANIFEST_PATH = f"{PARTITION_ROOT}/manifest.json"
+LEGACY_CSV_PATH = "responses.csv"
+
+
+FLUSH_SECONDS = metrics.histogram("wrvsl_flush_seconds", "Time to commit one batch of responses to GitHub.")
+FLUSH_ROWS = metrics.histogram("wrvsl_flush_rows", "Responses per group commit.",
+                               buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+FLUSH_FAILURES = metrics.counter("wrvsl_flush_failures_total", "Failed flushes, by reason.")
+COMMIT_CONFLICTS = metrics.counter("wrvsl_commit_conflicts_total", "Commits rebased after the branch moved.")
+
+
+# ---- Retry Helpers ----
+def backoff_delay(attempt, base=0.5, cap=60.0):
+    """Exponential backoff with jitter for the ``attempt``-th retry (0-based)."""
+    return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def rate_limit_wait(exc):
+    """Seconds to wait if ``exc`` is a GitHub rate-limit error, else None."""
+    if not isinstance(exc, GithubException):
+        return None
+    headers = {k.lower(): v for k, v in (exc.headers or {}).items()}
+    limited = isinstance(exc, RateLimitExceededException) or (
+        exc.status in (403, 429)
+        and (headers.get("x-ratelimit-remaining") == "0" or "retry-after" in headers)
+    )
+    if not limited:
+        return None
+    if "retry-after" in headers:
+        return float(headers["retry-after"])
+    if "x-ratelimit-reset" in headers:
+        return max(float(headers["x-ratelimit-reset"]) - time.time(), 0.0) + 1.0
+    return 60.0
+
+
+# ---- Local Append-Only Journal ----
+class ResponseJournal:
+    """Append-only JSONL log of confirmed submissions.
+
+    Every submission is one line; a separate checkpoint file records the byte
+    offset up to which lines have been committed to GitHub. Nothing is ever
+    rewritten, so appending costs the same regardless of how many responses
+    exist. ``source`` is a random id naming this journal in the manifest's
+    checkpoints.
+    """
+
+    def __init__(self, directory=JOURNAL_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "responses.jsonl")
+        self.checkpoint_path = os.path.join(directory, "responses.offset")
+        self.source = _source_id(os.path.join(directory, "source.id"))
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._oldest = None
+        for entry in self._read_pending()[1]:
+            self._pending += 1
+            if self._oldest is None:
+                self._oldest = entry["ts"]
+
+    def append(self, row):
+        entry = {"id": uuid.uuid4().hex, "ts": time.time(), "row": row}
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending += 1
+            if self._oldest is None:
+                self._oldest = entry["ts"]
+        return entry["id"]
+
+    def pending_count(self):
+        return self._pending
+
+    def oldest_pending_age(self):
+        oldest = self._oldest
+        return 0.0 if oldest is None else time.time() - oldest
+
+    def pending(self):
+        """Return ``(end_offset, entries)`` for everything not yet committed.
+
+        Each entry's ``seq`` is the offset just past its line.
+        """
+        with self._lock:
+            return self._read_pending()
+
+    def mark_flushed(self, end_offset):
+        with self._lock:
+            tmp = self.checkpoint_path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(str(end_offset))
+            os.replace(tmp, self.checkpoint_path)
+            _, remaining = self._read_pending()
+            self._pending = len(remaining)
+            self._oldest = remaining[0]["ts"] if remaining else None
+
+    def _flushed_offset(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _read_pending(self):
+        offset = self._flushed_offset()
+        if not os.path.exists(self.path):
+            return offset, []
+        entries = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # partially written line; pick it up on the next flush
+                offset += len(raw)
+                entry = json.loads(raw)
+                entry["seq"] = offset
+                entries.append(entry)
+        return offset, entries
+
+
+def _source_id(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        source = uuid.uuid4().hex
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(source)
+        os.replace(tmp, path)
+        return source
+
+
+# ---- CSV Helpers ----
+def _csv_header(csv_text):
+    first_line = csv_text.split("\n", 1)[0]
+    if not first_line.strip():
+        return []
+    return next(csv.reader([first_line]))
+
+
+def _rows_to_csv(header, rows, include_header):
+    buf = StringIO()
+    writer = csv.DictWriter(buf, fieldnames=header, extrasaction="ignore", lineterminator="\n")
+    if include_header:
+        writer.writeheader()
+    for row in rows:
+        writer.writerow({k: "" if v is None else v for k, v in row.items()})
+    return buf.getvalue()
+
+
+def append_rows_to_csv(csv_text, rows):
+    """Append ``rows`` (dicts) to existing CSV text.
+
+    A new file starts with the full schema header, so every partition has
+    the same layout and answers to hidden follow-ups never widen it. When
+    every key is already a column the new lines are appended as-is; only a
+    column outside the header (older partitions, keys outside the schema)
+    forces the header, and therefore the file, to be rewritten.
+    """
+    header = _csv_header(csv_text) or list(COLUMNS)
+    new_columns = []
+    for row in rows:
+        for key in row:
+            if key not in header and key not in new_columns:
+                new_columns.append(key)
+    if not csv_text.strip():
+        return _rows_to_csv(header + new_columns, rows, include_header=True)
+    if not new_columns:
+        if not csv_text.endswith("\n"):
+            csv_text += "\n"
+        return csv_text + _rows_to_csv(header, rows, include_header=False)
+    existing = list(csv.DictReader(StringIO(csv_text)))
+    return _rows_to_csv(header + new_columns, existing + list(rows), include_header=True)
+
+
+# ---- Partitions & Manifest ----
+def _slug(value):
+    return re.sub(r"[^a-z0-9]+", "-", str(value).lower()).strip("-") or "unknown"
+
+
+def partition_path(row, day=None, submitted_at=None):
+    """Partition file for ``row``: one CSV per UTC day and region.
+
+    The day is ``day`` if given, else the UTC date of ``submitted_at`` (epoch
+    seconds), else today.
+    """
+    if day is None:
+        ts = time.time() if submitted_at is None else submitted_at
+        day = datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+    region = row.get("region") or row.get("q1_region") or "unknown"
+    return f"{PARTITION_ROOT}/{day}/{_slug(region)}.csv"
+
+
+def _empty_manifest():
+    return {"version": 1, "partitions": {}}
+
+
+def _read_blob(repo, sha):
+    # The Git Data API has no 1 MB inline limit, unlike the contents endpoint.
+    blob = repo.get_git_blob(sha)
+    if blob.encoding == "base64":
+        return base64.b64decode(blob.content).decode("utf-8")
+    return blob.content
+
+
+def _count_rows(csv_text):
+    return max(sum(1 for _ in csv.reader(StringIO(csv_text))) - 1, 0)
+
+
+def load_manifest(repo, ref=None):
+    try:
+        if ref is None:
+            file = repo.get_contents(MANIFEST_PATH)
+        else:
+            file = repo.get_contents(MANIFEST_PATH, ref=ref)
+    except GithubException as e:
+        if e.status != 404:
+            raise
+        return _empty_manifest()
+    return json.loads(file.decoded_content.decode("utf-8"))
+
+
+def _register_legacy(repo, head_sha, manifest):
+    # First manifest ever written: keep the old monolithic file readable as a partition.
+    try:
+        legacy = repo.get_contents(LEGACY_CSV_PATH, ref=head_sha)
+    except GithubException as e:
+        if e.status != 404:
+            raise
+        return
+    manifest["partitions"][LEGACY_CSV_PATH] = {
+        "day": None,
+        "region": None,
+        "rows": _count_rows(_read_blob(repo, legacy.sha)),
+        "schema_version": 0,
+        "sha": legacy.sha,
+    }
+
+
+def read_partitions(repo, regions=None, since=None, until=None, manifest=None):
+    """Yield ``(path, meta, csv_text)`` for the partitions matching the filters.
+
+    ``regions`` is a collection of region names, ``since``/``until`` are
+    inclusive ``YYYY-MM-DD`` strings. Only matching partitions are fetched;
+    the legacy ``responses.csv`` has no day/region and is always included.
+    """
+    manifest = manifest or load_manifest(repo)
+    region_slugs = None if regions is None else {_slug(r) for r in regions}
+    for path, meta in sorted(manifest["partitions"].items()):
+        day, region = meta.get("day"), meta.get("region")
+        if region_slugs is not None and region is not None and _slug(region) not in region_slugs:
+            continue
+        if since is not None and day is not None and day < since:
+            continue
+        if until is not None and day is not None and day > until:
+            continue
+        yield path, meta, _read_blob(repo, meta["sha"])
+
+
+def load_responses(repo, regions=None, since=None, until=None):
+    import pandas as pd
+
+    frames = [pd.read_csv(StringIO(text)) for _, _, text in read_partitions(repo, regions, since, until)]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+class PartitionedCommitWriter:
+    """Writes a batch of rows to their partitions plus the manifest in one commit.
+
+    Uses the Git Data API (blobs, tree, commit, ref) so only the active
+    partitions are read and rewritten, and so a batch spanning several
+    partitions still lands atomically. The ref update is a fast-forward
+    only; if another writer moved the branch, the batch is rebuilt on top
+    of the new head.
+    """
+
+    def __init__(self, get_repo, branch=None, retries=COMMIT_RETRIES):
+        self.get_repo = get_repo
+        self.branch = branch
+        self.retries = retries
+
+    @staticmethod
+    def _partition(rows, day=None, submitted_at=None):
+        groups = {}
+        for row, ts in zip(rows, submitted_at or [None] * len(rows)):
+            groups.setdefault(partition_path(row, day, ts), []).append(row)
+        return groups
+
+    @classmethod
+    def request_cost(cls, rows, day=None, submitted_at=None):
+        """Upper bound on the API requests one ``commit`` of ``rows`` makes (without retries)."""
+        return 9 + 2 * len(cls._partition(rows, day, submitted_at))
+
+    def checkpoint(self, source):
+        """Journal position of ``source`` recorded by the last commit of its rows (0 if none)."""
+        repo = self.get_repo()
+        manifest = load_manifest(repo, ref=self.branch or repo.default_branch)
+        return manifest.get("checkpoints", {}).get(source, 0)
+
+    def commit(self, rows, day=None, checkpoint=None, submitted_at=None):
+        """Commit ``rows``; returns False if they were already committed.
+
+        ``submitted_at`` gives each row's submission time (epoch seconds),
+        which picks its day partition unless ``day`` overrides it for all.
+        ``checkpoint`` is ``(source, position)`` of the journal the rows come
+        from; it is recorded in the manifest in the same commit, and a commit
+        whose position is already recorded is skipped, so a retry after a
+        lost response cannot add the rows twice.
+        """
+        groups = self._partition(rows, day, submitted_at)
+        repo = self.get_repo()
+        branch = self.branch or repo.default_branch
+        for attempt in range(self.retries):
+            try:
+                return self._commit_once(repo, branch, groups, len(rows), checkpoint)
+            except GithubException as e:
+                # 409/422: the branch moved between our read and the ref update.
+                if e.status not in (409, 422) or attempt == self.retries - 1:
+                    raise
+                COMMIT_CONFLICTS.inc()
+                logger.info("Commit conflict on %s, rebasing (attempt %d)", branch, attempt + 1)
+                time.sleep(backoff_delay(attempt, cap=8.0))
+
+    def _commit_once(self, repo, branch, groups, n_rows, checkpoint=None):
+        ref = repo.get_git_ref(f"heads/{branch}")
+        head = repo.get_git_commit(ref.object.sha)
+        manifest = load_manifest(repo, ref=head.sha)
+        if checkpoint is not None:
+            source, position = checkpoint
+            checkpoints = manifest.setdefault("checkpoints", {})
+            if checkpoints.get(source, 0) >= position:
+                logger.info("Rows up to %s:%s are already committed", source, position)
+                return False
+            checkpoints[source] = position
+        if not manifest["partitions"]:
+            _register_legacy(repo, head.sha, manifest)
+
+        elements = []
+        for path, part_rows in groups.items():
+            meta = manifest["partitions"].get(path)
+            csv_text = _read_blob(repo, meta["sha"]) if meta else ""
+            blob = repo.create_git_blob(append_rows_to_csv(csv_text, part_rows), "utf-8")
+            _, day, region_file = path.split("/")
+            manifest["partitions"][path] = {
+                "day": day,
+                "region": part_rows[0].get("region") or part_rows[0].get("q1_region") or "unknown",
+                "rows": (meta["rows"] if meta else 0) + len(part_rows),
+                "schema_version": SCHEMA_VERSION,
+                "sha": blob.sha,
+            }
+            elements.append(InputGitTreeElement(path, "100644", "blob", sha=blob.sha))
+
+        manifest_blob = repo.create_git_blob(json.dumps(manifest, indent=2, sort_keys=True), "utf-8")
+        elements.append(InputGitTreeElement(MANIFEST_PATH, "100644", "blob", sha=manifest_blob.sha))
+        tree = repo.create_git_tree(elements, base_tree=head.tree)
+        commit = repo.create_git_commit(f"Add {n_rows} WRVSL response(s)", tree, [head])
+        ref.edit(commit.sha, force=False)
+        return True
+
+
+# ---- Group Commit Flusher ----
+class GroupCommitFlusher:
+    """Commits pending journal entries to GitHub in batches.
+
+    ``journal`` is anything with the ``ResponseJournal`` source/pending/mark_flushed
+    interface; ``SQLiteBackend`` provides it too, which is how a SQLite store
+    is mirrored to GitHub.
+    ``quota``, if given, returns how many seconds writes should be held
+    back (e.g. ``GitHubClient.write_delay``) so flushes stop short of the
+    rate limit.
+
+    A flush happens when ``max_rows`` submissions are pending or the oldest
+    one has waited ``max_age`` seconds. All pending rows are handed to
+    ``writer.commit`` together, which lands them in a single commit along
+    with the journal position they reach. After a restart or a failed
+    flush, that position is read back first, so rows a lost response (or a
+    crash before ``mark_flushed``) left committed are not sent again.
+    """
+
+    def __init__(self, journal, writer, max_rows=FLUSH_MAX_ROWS, max_age=FLUSH_MAX_AGE, quota=None):
+        self.journal = journal
+        self.writer = writer
+        self.quota = quota
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._failures = 0
+        self._resume_at = 0.0
+        self._reconcile = True
+
+    def start(self, poll_interval=FLUSH_POLL_INTERVAL):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, args=(poll_interval,), name="wrvsl-flusher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def notify(self):
+        """Called after each append; wakes the flusher if a threshold is hit."""
+        if self.should_flush():
+            self._wake.set()
+
+    def should_flush(self):
+        pending = self.journal.pending_count()
+        if not pending:
+            return False
+        return pending >= self.max_rows or self.journal.oldest_pending_age() >= self.max_age
+
+    def flush(self):
+        """Commit everything pending. Returns the number of rows committed."""
+        with self._flush_lock:
+            end_offset, entries = self.journal.pending()
+            if not entries:
+                return 0
+            source = self.journal.source
+            if self._reconcile:
+                committed = self.writer.checkpoint(source)
+                entries = [entry for entry in entries if entry["seq"] > committed]
+                if not entries:
+                    self.journal.mark_flushed(end_offset)
+                    self._reconcile = False
+                    return 0
+            try:
+                with FLUSH_SECONDS.time():
+                    self.writer.commit([entry["row"] for entry in entries], checkpoint=(source, end_offset),
+                                       submitted_at=[entry["ts"] for entry in entries])
+            except Exception:
+                self._reconcile = True
+                raise
+            self._reconcile = False
+            self.journal.mark_flushed(end_offset)
+            FLUSH_ROWS.observe(len(entries))
+            return len(entries)
+
+    def _run(self, poll_interval):
+        while True:
+            self._wake.wait(poll_interval)
+            self._wake.clear()
+            if time.time() < self._resume_at or not self.should_flush():
+                continue
+            delay = self.quota() if self.quota is not None else 0.0
+            if delay:
+                self._resume_at = time.time() + delay
+                continue
+            try:
+                self.flush()
+                self._failures = 0
+            except Exception as e:
+                # Rows stay in the journal; back off (or wait out the rate limit) and retry.
+                wait = rate_limit_wait(e)
+                if wait is None:
+                    wait = backoff_delay(self._failures, base=poll_interval, cap=600.0)
+                    FLUSH_FAILURES.inc(reason="error")
+                    logger.exception("Flushing responses to GitHub failed, retrying in %.0fs", wait)
+                else:
+                    FLUSH_FAILURES.inc(reason="rate_limit")
+                    logger.warning("GitHub rate limit reached, deferring flush for %.0fs", wait)
+                self._failures += 1
+                self._resume_at = time.time() + wait
+
+
+# ---- Storage Backends ----
+class StorageBackend:
+    """Interface shared by every response store."""
+
+    def append(self, row):
+        """Persist one response dict and return an identifier for it."""
+        raise NotImplementedError
+
+    def read_range(self, start=0, stop=None):
+        """Return responses ``start:stop`` (in submission order) as dicts."""
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+
+class GitHubBackend(StorageBackend):
+    """Local journal + group-commit flusher writing partitions to GitHub.
+
+    ``count`` and ``read_range`` reflect what has been committed; rows still
+    waiting in the journal are not visible until the next flush.
+    """
+
+    def __init__(self, get_repo, journal_dir=JOURNAL_DIR, branch=None, quota=None):
+        self.get_repo = get_repo
+        self.journal = ResponseJournal(journal_dir)
+        self.flusher = GroupCommitFlusher(
+            self.journal, PartitionedCommitWriter(get_repo, branch), quota=quota
+        ).start()
+
+    def append(self, row):
+        submission_id = self.journal.append(row)
+        self.flusher.notify()
+        return submission_id
+
+    def count(self):
+        manifest = load_manifest(self.get_repo())
+        return sum(meta["rows"] for meta in manifest["partitions"].values())
+
+    def read_range(self, start=0, stop=None):
+        repo = self.get_repo()
+        manifest = load_manifest(repo)
+        rows, position = [], 0
+        for path, meta in sorted(manifest["partitions"].items()):
+            # Skip whole partitions outside the range using the manifest counts.
+            if position + meta["rows"] <= start:
+                position += meta["rows"]
+                continue
+            if stop is not None and position >= stop:
+                break
+            part_rows = list(csv.DictReader(StringIO(_read_blob(repo, meta["sha"]))))
+            lo = max(start - position, 0)
+            hi = None if stop is None else stop - position
+            rows.extend(part_rows[lo:hi])
+            position += meta["rows"]
+        return rows
+
+
+class SQLiteBackend(LocalStore, StorageBackend):
+    """Local SQLite store in WAL mode.
+
+    Each append is a single-row INSERT in its own short transaction, so many
+    Streamlit sessions can write concurrently while readers never block.
+    The backend also implements the journal interface used by
+    ``GroupCommitFlusher`` (``source``/``pending``/``mark_flushed``), tracking a sync
+    watermark so it can be mirrored to GitHub in bulk.
+    """
+
+    def __init__(self, path=SQLITE_PATH):
+        super().__init__(path)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, submitted_at REAL NOT NULL, data TEXT NOT NULL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, last_id INTEGER NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS sync_source (id TEXT NOT NULL)")
+        conn.execute("INSERT INTO sync_source SELECT ? WHERE NOT EXISTS (SELECT 1 FROM sync_source)",
+                     (uuid.uuid4().hex,))
+        self.source = conn.execute("SELECT id FROM sync_source").fetchone()[0]
+
+    def append(self, row):
+        cur = self._conn().execute(
+            "INSERT INTO responses (submitted_at, data) VALUES (?, ?)",
+            (time.time(), json.dumps(row, default=str)),
+        )
+        return cur.lastrowid
+
+    def append_many(self, rows, submitted_at=None):
+        """Persist ``rows`` in one transaction; all or none are stored.
+
+        ``submitted_at`` (epoch seconds) dates them, e.g. when they were
+        collected offline; defaults to now.
+        """
+        submitted_at = time.time() if submitted_at is None else submitted_at
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO responses (submitted_at, data) VALUES (?, ?)",
+                [(submitted_at, json.dumps(row, default=str)) for row in rows],
+            )
+        return len(rows)
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def read_range(self, start=0, stop=None):
+        limit = -1 if stop is None else max(stop - start, 0)
+        cur = self._conn().execute(
+            "SELECT data FROM responses ORDER BY id LIMIT ? OFFSET ?", (limit, start)
+        )
+        return [json.loads(data) for (data,) in cur]
+
+    def read_after(self, last_id=0, limit=1000):
+        """Return up to ``limit`` ``(id, submitted_at, row)`` tuples with ids above ``last_id``, in id order."""
+        cur = self._conn().execute(
+            "SELECT id, submitted_at, data FROM responses WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)
+        )
+        return [(row_id, ts, json.loads(data)) for row_id, ts, data in cur]
+
+    def scan(self, where=None):
+        """Yield responses in submission order, one row at a time.
+
+        ``where`` maps a column to the values to keep (``None`` matches a
+        missing answer); the filter runs inside SQLite, so rows that do not
+        match are never decoded.
+        """
+        clauses, params = [], []
+        for column, values in (where or {}).items():
+            field = f"json_extract(data, '$.\"{column}\"')"
+            values = list(values)
+            alternatives = [f"{field} IS NULL"] if None in values else []
+            present = [v for v in values if v is not None]
+            if present:
+                alternatives.append(f"{field} IN ({', '.join('?' * len(present))})")
+                params.extend(present)
+            clauses.append("(" + (" OR ".join(alternatives) or "0") + ")")
+        sql = "SELECT data FROM responses"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        # A private connection: the cursor stays open while the caller consumes it.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            for (data,) in conn.execute(sql + " ORDER BY id", params):
+                yield json.loads(data)
+        finally:
+            conn.close()
+
+    # -- journal interface for GroupCommitFlusher --
+    def _synced_id(self):
+        row = self._conn().execute("SELECT last_id FROM sync_state WHERE name = 'github'").fetchone()
+        return row[0] if row else 0
+
+    def pending_count(self):
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM responses WHERE id > ?", (self._synced_id(),)
+        ).fetchone()[0]
+
+    def oldest_pending_age(self):
+        row = self._conn().execute(
+            "SELECT submitted_at FROM responses WHERE id > ? ORDER BY id LIMIT 1", (self._synced_id(),)
+        ).fetchone()
+        return 0.0 if row is None else time.time() - row[0]
+
+    def pending(self):
+        cur = self._conn().execute(
+            "SELECT id, submitted_at, data FROM responses WHERE id > ? ORDER BY id", (self._synced_id(),)
+        )
+        entries = [{"id": rid, "seq": rid, "ts": ts, "row": json.loads(data)} for rid, ts, data in cur]
+        return (entries[-1]["id"] if entries else self._synced_id()), entries
+
+    def mark_flushed(self, end_offset):
+        self._conn().execute(
+            "INSERT INTO sync_state (name, last_id) VALUES ('github', ?) "
+            "ON CONFLICT(name) DO UPDATE SET last_id = excluded.last_id",
+            (end_offset,),
+        )
+
+
+def sync_sqlite_to_github(backend, get_repo, branch=None):
+    """One-shot mirror of every unsynced SQLite row to GitHub in a single commit."""
+    return GroupCommitFlusher(backend, PartitionedCommitWriter(get_repo, branch)).flush()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from github_client import GitHubClient
+
+    parser = argparse.ArgumentParser(description="Mirror the local SQLite response store to GitHub.")
+    parser.add_argument("--db", default=SQLITE_PATH)
+    parser.add_argument("--repo", default=REPO_NAME)
+    parser.add_argument("--branch", default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    client = GitHubClient(os.environ["GITHUB_TOKEN"], args.repo)
+    synced = sync_sqlite_to_github(SQLiteBackend(args.db), client.get_repo, args.branch)
+    logger.info("Synced %d response(s) to %s (%d API requests left)",
+                synced, args.repo, client.rate_limit()["remaining"])
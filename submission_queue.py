@@ -0,0 +1,134 @@
+import heapq
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import metrics
+from storage import backoff_delay, rate_limit_wait
+
+logger = logging.getLogger(__name__)
+
+# ---- Queue Configuration ----
+QUEUE_MAXSIZE = 1000
+STATUS_HISTORY = 10000   # finished submissions whose status is kept for polling
+MAX_BACKOFF = 120.0
+
+QUEUED, SAVING, RETRYING, SAVED = "queued", "saving", "retrying", "saved"
+
+SUBMISSION_SECONDS = metrics.histogram("wrvsl_submission_seconds", "Time from submit to saved.")
+PERSIST_SECONDS = metrics.histogram("wrvsl_persist_seconds", "Duration of one persist attempt, by outcome.")
+SUBMISSION_RETRIES = metrics.counter("wrvsl_submission_retries_total", "Persist attempts that will be retried.")
+
+
+# ---- Process-Wide Submission Worker ----
+class SubmissionQueue:
+    """Bounded queue of submissions persisted by one background thread.
+
+    ``submit`` only enqueues, so the caller returns immediately with a
+    submission id whose progress can be polled through ``status``. A failed
+    ``persist`` call is never dropped: it is rescheduled with exponential
+    backoff (or after the GitHub rate-limit reset) while later submissions
+    keep flowing.
+    """
+
+    def __init__(self, persist, maxsize=QUEUE_MAXSIZE, max_backoff=MAX_BACKOFF):
+        self.persist = persist
+        self.max_backoff = max_backoff
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._retries = []          # heap of (due_time, seq, submission_id, row)
+        self._seq = 0
+        self._paused_until = 0.0
+        self._status = OrderedDict()
+        self._status_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="wrvsl-submissions", daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, row):
+        """Enqueue ``row`` and return its submission id. Raises ``queue.Full`` when saturated."""
+        submission_id = uuid.uuid4().hex
+        self._set_status(submission_id, QUEUED, attempts=0, error=None, submitted_at=time.time())
+        try:
+            self._queue.put_nowait((submission_id, row))
+        except queue.Full:
+            with self._status_lock:
+                self._status.pop(submission_id, None)
+            raise
+        return submission_id
+
+    def status(self, submission_id):
+        with self._status_lock:
+            status = self._status.get(submission_id)
+            return None if status is None else dict(status)
+
+    def depth(self):
+        return self._queue.qsize() + len(self._retries)
+
+    def _set_status(self, submission_id, state, **fields):
+        with self._status_lock:
+            status = self._status.setdefault(submission_id, {})
+            status.update(fields, state=state)
+            self._status.move_to_end(submission_id)
+            while len(self._status) > STATUS_HISTORY:
+                oldest_id, oldest = next(iter(self._status.items()))
+                if oldest["state"] != SAVED:
+                    break
+                self._status.pop(oldest_id)
+
+    def _next_item(self):
+        now = time.time()
+        if self._retries and self._retries[0][0] <= now and now >= self._paused_until:
+            _, _, submission_id, row = heapq.heappop(self._retries)
+            return submission_id, row
+        timeout = max(self._paused_until - now, 0.0)
+        if self._retries:
+            timeout = max(timeout, self._retries[0][0] - now, 0.01)
+        try:
+            item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get()
+        except queue.Empty:
+            return None
+        if time.time() < self._paused_until:
+            # Rate limited: park new work on the retry heap instead of calling out.
+            self._schedule(*item, due=self._paused_until)
+            return None
+        return item
+
+    def _schedule(self, submission_id, row, due):
+        self._seq += 1
+        heapq.heappush(self._retries, (due, self._seq, submission_id, row))
+
+    def _run(self):
+        while True:
+            item = self._next_item()
+            if item is None:
+                continue
+            submission_id, row = item
+            attempts = self.status(submission_id)["attempts"] + 1
+            self._set_status(submission_id, SAVING, attempts=attempts)
+            started = time.perf_counter()
+            try:
+                self.persist(row)
+            except Exception as e:
+                PERSIST_SECONDS.observe(time.perf_counter() - started, outcome="error")
+                SUBMISSION_RETRIES.inc()
+                wait = rate_limit_wait(e)
+                if wait is not None:
+                    self._paused_until = time.time() + wait
+                else:
+                    wait = backoff_delay(attempts - 1, cap=self.max_backoff)
+                logger.warning("Saving submission %s failed (attempt %d), retrying in %.1fs: %s",
+                               submission_id, attempts, wait, e)
+                self._set_status(submission_id, RETRYING, error=str(e))
+                self._schedule(submission_id, row, due=time.time() + wait)
+            else:
+                PERSIST_SECONDS.observe(time.perf_counter() - started, outcome="ok")
+                saved_at = time.time()
+                SUBMISSION_SECONDS.observe(saved_at - self.status(submission_id)["submitted_at"])
+                self._set_status(submission_id, SAVED, error=None, saved_at=saved_at)
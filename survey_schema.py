@@ -0,0 +1,401 @@
+import ast
+from dataclasses import dataclass, field
+
+# ---- Schema Version ----
+# 0: the original responses.csv layout (short column names, ordinal answers as digits)
+# 1: raw widget keys (q1_region, q7_1_rwis, ...) written straight from session state
+# 2: canonical columns from this schema (region, rw_sensors, ...) with text answers
+SCHEMA_VERSION = 2
+
+# ---- Shared Option Lists ----
+criticality_options = [
+    "Most Critical",
+    "Highly Critical",
+    "Moderately Critical",
+    "Slightly Critical",
+    "Not Critical"
+]
+
+emerging_options = [
+    "Most Important",
+    "Highly Important",
+    "Moderately Important",
+    "Least Important"
+]
+
+frequency_options = ['Daily', 'Weekly', 'Monthly', 'Never']
+source_options = ['Field', 'Simulation']
+
+CRITICALITY_SCALE = """
+Criticality Scale:
+- Most Critical – Essential and must be addressed immediately
+- Highly Critical – Very important but not the highest priority
+- Moderately Critical – Important but not urgent
+- Slightly Critical – Somewhat important but can be deferred
+- Not Critical – Minimal impact or not relevant
+        """
+
+RANKING_SCALE = "\n" + "  \n".join([
+    "Ranking Scale:",
+    "• Most Important – Game-changing technology with immediate and significant impact",
+    "• Highly Important – Strong potential for impact but not the top priority",
+    "• Moderately Important – Has relevance but not a critical focus area",
+    "• Least Important – Low impact or not a priority at this time",
+])
+
+# Widget kind -> storage type
+CHOICE_KINDS = ("radio", "selectbox")
+TEXT_KINDS = ("text_input", "text_area")
+
+
+# ---- Schema Building Blocks ----
+@dataclass(frozen=True)
+class Note:
+    """Static markdown shown between questions."""
+    text: str
+
+
+@dataclass(frozen=True)
+class Question:
+    key: str                 # session-state / widget key
+    column: str              # canonical column in stored responses
+    kind: str                # radio | selectbox | multiselect | slider | text_input | text_area
+    label: str
+    help: str = ""
+    options: tuple = ()
+    ordinal: bool = False    # options form an ordered scale, in option order
+    min_value: int = 0
+    max_value: int = 100
+    max_words: int = None
+    show_if: tuple = None    # (question key, value): shown when that answer equals/contains value
+    legacy_columns: tuple = ()
+    option_set: frozenset = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "option_set", frozenset(self.options))
+
+    @property
+    def dtype(self):
+        if self.kind in CHOICE_KINDS:
+            return "ordinal" if self.ordinal else "category"
+        if self.kind == "multiselect":
+            return "list"
+        if self.kind == "slider":
+            return "int"
+        return "text"
+
+    def is_visible(self, responses):
+        if self.show_if is None:
+            return True
+        parent, value = self.show_if
+        answer = responses.get(parent)
+        if isinstance(answer, (list, tuple)):
+            return value in answer
+        return answer == value
+
+    def normalize(self, value):
+        """Coerce a stored or imported value to the form the app itself produces.
+
+        Handles what older data contains: blank cells and NaN, multi-selects
+        stored as stringified Python lists, sliders read back as floats, and
+        scale answers stored as 1-based digits ("1" = first option). Slider
+        values that are not numbers ("20%", "n/a") or fall outside the
+        slider's range become None.
+        """
+        if is_missing(value):
+            return [] if self.kind == "multiselect" else None
+        if self.kind == "multiselect":
+            if isinstance(value, str):
+                value = parse_list(value)
+            return [str(v) for v in value]
+        if self.kind == "slider":
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                return None
+            return int(number) if self.min_value <= number <= self.max_value else None
+        value = str(value).strip() if not isinstance(value, str) else value.strip()
+        if self.kind in CHOICE_KINDS and value not in self.option_set and self.ordinal:
+            try:
+                position = int(float(value))
+            except ValueError:
+                return value
+            if 1 <= position <= len(self.options):
+                return self.options[position - 1]
+        return value
+
+    def encode(self, value):
+        """Compact code for a normalized value: option index, bitmask or int."""
+        if self.kind in CHOICE_KINDS:
+            return self.options.index(value) if value in self.option_set else None
+        if self.kind == "multiselect":
+            mask = 0
+            for v in value or ():
+                if v in self.option_set:
+                    mask |= 1 << self.options.index(v)
+            return mask
+        if self.kind == "slider":
+            return None if value is None else int(value)
+        return value
+
+    def decode(self, code):
+        if self.kind in CHOICE_KINDS:
+            return None if code is None else self.options[code]
+        if self.kind == "multiselect":
+            return [opt for i, opt in enumerate(self.options) if code & (1 << i)]
+        return code
+
+    def validate(self, value):
+        """Return an error message for ``value``, or None if it is acceptable."""
+        if value is None or value == "" or value == []:
+            return None
+        if self.kind in CHOICE_KINDS and value not in self.option_set:
+            return f"{self.column}: {value!r} is not one of the allowed options"
+        if self.kind == "multiselect":
+            unknown = [v for v in value if v not in self.option_set]
+            if unknown:
+                return f"{self.column}: {unknown!r} are not allowed options"
+        if self.kind == "slider" and not self.min_value <= int(value) <= self.max_value:
+            return f"{self.column}: {value} is outside {self.min_value}–{self.max_value}"
+        if self.max_words is not None and count_words(value) > self.max_words:
+            return f"{self.column}: more than {self.max_words} words"
+        return None
+
+
+@dataclass(frozen=True)
+class Section:
+    title: str
+    subheader: str
+    items: tuple
+
+    @property
+    def questions(self):
+        return tuple(item for item in self.items if isinstance(item, Question))
+
+
+def is_missing(value):
+    return value is None or value == "" or (isinstance(value, float) and value != value)
+
+
+def parse_list(text):
+    """Parse a multi-select stored as text, e.g. "['Rainfall intensity', 'Wind speed']"."""
+    text = text.strip()
+    if not text:
+        return []
+    if text.startswith("["):
+        try:
+            parsed = ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            parsed = None
+        if isinstance(parsed, (list, tuple)):
+            return list(parsed)
+    return [part.strip() for part in text.split(";") if part.strip()]
+
+
+def count_words(text):
+    return len((text or "").split())
+
+
+def _scale(key, column, label, options, help, legacy=()):
+    return Question(key, column, "radio", label, help, tuple(options), ordinal=True, legacy_columns=legacy)
+
+
+# ---- Survey Definition ----
+SURVEY = (
+    Section("Introduction & Participant Context", "Participant Context", (
+        Question('q1_region', 'region', 'radio', "1). Geographical region of operation",
+                 "Select the region where your operations are based.",
+                 ('North America', 'Europe', 'Australia/NZ', 'Asia', 'Middle East', 'Africa', 'South America')),
+        Question('q2_experience', 'experience', 'radio', "2). Years of experience with WRVSL systems",
+                 "Choose the option that best describes your experience.",
+                 ('<1 year', '1–3 years', '4–7 years', '8+ years'), ordinal=True),
+        Question('q3_org_type', 'org_type', 'selectbox', "3). Organization type",
+                 "Select the type of organization you are affiliated with.",
+                 ('Government agency', 'Private consultancy', 'Academic', 'NGO', 'Other')),
+    )),
+    Section("System Design", "System Design", (
+        Question('q4_vsl_types', 'vsl_types', 'multiselect', "4). Types of VSL systems managed",
+                 "Select all the Variable Speed Limit systems your organization manages.",
+                 ('Congestion-responsive', 'Weather-responsive', 'Event-specific', 'Other')),
+        Question('q4_vsl_other', 'vsl_other', 'text_input', "4).a. Please specify other VSL type",
+                 "Enter details if your system type does not fit the listed options.",
+                 show_if=('q4_vsl_types', 'Other')),
+        Question('q5_weather_params', 'weather_params', 'multiselect',
+                 "5). Weather parameter(s) triggering speed adjustments",
+                 "Select weather parameters that are critical in triggering speed adjustments.",
+                 ('Rainfall intensity', 'Snow accumulation', 'Pavement friction', 'Visibility', 'Wind speed', 'Other')),
+        Question('q6_verification', 'verification_method', 'radio', "6). Verification method for weather inputs",
+                 "Choose how you verify the weather data inputs for accuracy.",
+                 ('Cameras', 'Alternative data sources', 'None')),
+        Question('q6_verification_sources', 'verification_sources', 'text_input',
+                 "6).a. Specify alternative verification sources",
+                 "List the alternative sources used to verify weather inputs.",
+                 show_if=('q6_verification', 'Alternative data sources')),
+        Note("7). Data sources used for weather inputs (Criticality Scale below)\n        " + CRITICALITY_SCALE),
+        _scale('q7_1_rwis', 'rw_sensors', "7.1) Road Weather Information System (RWIS)/roadside sensors",
+               criticality_options, "Rate the criticality of RWIS sensors."),
+        _scale('q7_2_vehicle_telematics', 'vehicle_telematics', "7.2) Connected vehicle telematics",
+               criticality_options, "Rate the criticality of connected vehicle data."),
+        _scale('q7_3_sat_forecasts', 'sat_forecasts', "7.3) Radar/satellite forecasts",
+               criticality_options, "Rate the criticality of radar/satellite forecasts."),
+        _scale('q7_4_thermal_cameras', 'thermal_cameras', "7.4) Thermal/visual cameras",
+               criticality_options, "Rate the criticality of thermal/visual cameras."),
+        _scale('q7_5_manual_reports', 'manual_reports', "7.5) Manual operator reports",
+               criticality_options, "Rate the criticality of manual operator reports."),
+        Question('q8_control_logic', 'control_logic', 'radio', "8). Control logic architecture",
+                 "Select the type of control logic used in your system.",
+                 ('Rule-based thresholds (fixed)', 'Dynamic thresholds (real-time adjustments)', 'Machine learning based')),
+        Question('q9_operation_mode', 'operation_mode', 'radio', "9). Mode of operation",
+                 "Select the operational mode that best describes your system.",
+                 ('Alert only', 'System-recommended with operator approval', 'Fully automated')),
+        Question('q10_deactivation_mode', 'deactivation_mode', 'radio', "10). Mode of deactivation",
+                 "Choose how the system is deactivated under normal conditions.",
+                 ('Manual removal', 'Automated with operator alert', 'Automated without alert')),
+        Question('q11_speed_adjustment', 'speed_adjustment', 'radio', "11). Speed adjustment protocols",
+                 "Select how speed adjustments are determined.",
+                 ('Fixed increments', 'Dynamic models', 'Operator discretion')),
+        Question('q12_geo_coverage', 'geo_coverage', 'radio', "12). Geographic coverage",
+                 "Select the geographical coverage of your WRVSL system.",
+                 ('Within 5km of sensor', 'Entire carriageway', 'Overlapping zones')),
+    )),
+    Section("Operational Challenges", "Operational Challenges", (
+        Note("13). Challenge severity (Criticality Scale below)\n        " + CRITICALITY_SCALE),
+        _scale('q13_sensor_reliability', 'sensor_reliability', "13.1) Sensor reliability",
+               criticality_options, "Rate the severity of sensor."),
+        _scale('q13_driver_compliance', 'driver_compliance', "13.2) Driver compliance",
+               criticality_options, "Rate the severity of driver."),
+        _scale('q13_maintenance_costs', 'maintenance_costs', "13.3) Maintenance costs",
+               criticality_options, "Rate the severity of maintenance."),
+        _scale('q13_coordination', 'coordination', "13.4) Inter-agency coordination",
+               criticality_options, "Rate the severity of inter-agency."),
+        _scale('q13_fte_challenge', 'fte_challenge', "13.5) Operational FTE/resources",
+               criticality_options, "Rate the severity of operational."),
+        Question('q14_mitigation_strategies', 'mitigation_strategies', 'multiselect',
+                 "14). Mitigation strategies for non-compliance",
+                 "Select all strategies you employ to address non-compliance.",
+                 ('Public education campaigns', 'Dynamic signage with penalty warnings', 'Automated enforcement', 'None')),
+    )),
+    Section("Impact Assessment", "Impact Assessment", (
+        Question('q15_primary_crash_reduction', 'primary_crash_reduction', 'slider',
+                 "15). Primary crash reduction (%)",
+                 "Estimate the percentage improvement in safety (primary crash reduction) due to WRVSL.",
+                 legacy_columns=('safety_improvement',)),
+        Question('q16_secondary_crash_reduction', 'secondary_crash_reduction', 'slider',
+                 "16). Secondary crash reduction (%)",
+                 "Estimate the percentage improvement in safety (secondary crash reduction) due to WRVSL."),
+        Question('q17_safety_source', 'safety_source', 'radio', "17). Data source for safety improvement",
+                 "Select whether the safety data is based on field observations or simulation results.",
+                 tuple(source_options)),
+        Question('q18_speed_compliance', 'speed_compliance', 'slider', "18). Speed compliance rate (%)",
+                 "Indicate the observed or expected speed compliance rate."),
+        Question('q19_speed_source', 'speed_source', 'radio', "19). Data source for speed compliance",
+                 "Select whether the speed compliance data is based on field data or simulation.",
+                 tuple(source_options)),
+    )),
+    Section("Lessons Learned", "Lessons Learned", (
+        Question('q20_success_story', 'success_story', 'text_area', "20). Success story (Max 200 words)",
+                 "Share a success story related to WRVSL implementation. Please keep within 200 words.",
+                 max_words=200),
+        Question('q21_unexpected_challenges', 'unexpected_challenges', 'text_area',
+                 "21). Unexpected challenges & resolution (Max 150 words)",
+                 "Describe any unforeseen challenges and how they were addressed, keeping within 150 words.",
+                 max_words=150),
+    )),
+    Section("Policy & Governance", "Policy & Governance", (
+        Question('q22_regulations', 'regulations', 'multiselect', "22). Regulatory frameworks used",
+                 "Select all regulatory frameworks that influence your system.",
+                 ('Austroads Guidelines', 'MUTCD Section 4L', 'EU Directive 2021/034', 'Other')),
+        Question('q22_regulations_other', 'regulations_other', 'text_input',
+                 "22).a. Please specify other regulatory frameworks",
+                 "Enter additional details if other regulatory frameworks apply.",
+                 show_if=('q22_regulations', 'Other')),
+        Note("**23). Multi-agency collaboration frequency**"),
+        _scale('q23_meteorology', 'meteorology', "23.1) Meteorological department", frequency_options,
+               "How often do you collaborate with the meteorological department?"),
+        _scale('q23_law_enforcement', 'law_enforcement', "23.2) Law enforcement", frequency_options,
+               "How frequently is there interaction with law enforcement?"),
+        _scale('q23_road_maintenance', 'road_maintenance', "23.3) Road maintenance teams", frequency_options,
+               "Indicate how often you engage with road maintenance teams."),
+    )),
+    Section("Future Directions", "Future Directions", (
+        Note("24). Rank emerging technologies (Ranking Scale below)\n        " + RANKING_SCALE),
+        _scale('q24_ai_ml', 'ai_ml', "24.1) AI/ML prediction models", emerging_options,
+               "Select the ranking for AI/ML models for predicting weather-related impacts."),
+        _scale('q24_iot_sensors', 'iot_sensors', "24.2) Satellite-connected IoT sensors", emerging_options,
+               "Select the ranking for IoT sensors in your system."),
+        _scale('q24_cv_integration', 'cv_integration', "24.3) Connected vehicle integration", emerging_options,
+               "Select the ranking for connected vehicle data integration."),
+        Question('q25_research_gaps', 'research_gaps', 'text_area',
+                 "25). Research gaps hindering WRVSL advancements (100 words max)",
+                 "Briefly describe the research gaps that need to be addressed to advance WRVSL technology.",
+                 max_words=100),
+    )),
+    Section("Optional Demographics", "Optional Demographics", (
+        Question('q26_follow_up', 'follow_up', 'radio', "26). Contact for follow-up?",
+                 "Indicate if you are willing to be contacted for follow-up questions.", ('Yes', 'No')),
+        Question('q27_email', 'email', 'text_input', "27). Enter email",
+                 "Please provide your email address for further contact.",
+                 show_if=('q26_follow_up', 'Yes')),
+    )),
+)
+
+# ---- Lookups Compiled Once at Import ----
+SECTIONS = [section.title for section in SURVEY]
+QUESTIONS = tuple(q for section in SURVEY for q in section.questions)
+QUESTIONS_BY_KEY = {q.key: q for q in QUESTIONS}
+QUESTIONS_BY_COLUMN = {q.column: q for q in QUESTIONS}
+COLUMNS = [q.column for q in QUESTIONS]
+
+# Any historical column name (schema 0 short names, schema 1 widget keys) -> question
+COLUMN_ALIASES = {}
+for _q in QUESTIONS:
+    for _name in (_q.column, _q.key) + _q.legacy_columns:
+        COLUMN_ALIASES[_name] = _q
+
+
+def to_record(responses):
+    """Map session-state answers (widget keys) to a canonical-column record.
+
+    Answers to follow-ups whose condition is no longer met are dropped, so a
+    stale "Other" text does not survive after "Other" was deselected.
+    """
+    record = {}
+    for q in QUESTIONS:
+        if q.key in responses and q.is_visible(responses):
+            record[q.column] = responses[q.key]
+    return record
+
+
+def canonicalize(row, rejected=None):
+    """Map a row in any historical layout to canonical columns with normalized values.
+
+    Columns that match no question are dropped. When a row carries both an
+    old and a new name for the same question, the first non-missing value wins.
+    Values ``normalize`` had to discard are counted per column in ``rejected``
+    (a ``Counter``), if given.
+    """
+    record = {}
+    for name, value in row.items():
+        q = COLUMN_ALIASES.get(name)
+        if q is None:
+            continue
+        raw, value = value, q.normalize(value)
+        if value is None and rejected is not None and not is_missing(raw):
+            rejected[q.column] += 1
+        if q.column not in record or is_missing(record[q.column]) or record[q.column] == []:
+            record[q.column] = value
+    return record
+
+
+def validate_record(record):
+    """Return the list of validation errors for a canonical record."""
+    errors = []
+    for column, value in record.items():
+        q = QUESTIONS_BY_COLUMN.get(column)
+        if q is None:
+            errors.append(f"{column}: unknown column")
+            continue
+        error = q.validate(value)
+        if error is not None:
+            errors.append(error)
+    return errors
@@ -0,0 +1,224 @@
+import logging
+import math
+import re
+from collections import Counter
+from datetime import datetime, timezone
+
+from common import DerivedStore, load_csv_records
+from survey_schema import QUESTIONS, canonicalize, is_missing
+
+logger = logging.getLogger(__name__)
+
+# ---- Index Configuration ----
+INDEX_PATH = "text_index.db"
+TEXT_QUESTIONS = tuple(q for q in QUESTIONS if q.max_words is not None)
+TEXT_COLUMNS = tuple(q.column for q in TEXT_QUESTIONS)
+NGRAM_SIZES = (1, 2, 3)
+MISSING = ""
+_TOKEN = re.compile(r"[a-z0-9]+(?:['’][a-z]+)?")
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been but by can could did do does for from had has have how
+i if in into is it its just more most my no not of on or our out so some such than that the their them then
+there these they this to too up us very was we were what when where which while who will with would you your
+""".split())
+
+
+def _day(ts=None):
+    moment = datetime.now(timezone.utc) if ts is None else datetime.fromtimestamp(ts, timezone.utc)
+    return moment.strftime("%Y-%m-%d")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def truncate_words(text, limit):
+    """Cut ``text`` to its first ``limit`` whitespace-separated words."""
+    words = text.split(None, limit)
+    return " ".join(words[:limit]) if len(words) > limit else text
+
+
+def ngrams(tokens, sizes=NGRAM_SIZES):
+    """Keyword n-grams: runs of tokens that neither start nor end with a stopword."""
+    for size in sizes:
+        for i in range(len(tokens) - size + 1):
+            gram = tokens[i:i + size]
+            if gram[0] not in STOPWORDS and gram[-1] not in STOPWORDS:
+                yield " ".join(gram)
+
+
+# ---- Incrementally Maintained Inverted Index ----
+class TextIndex(DerivedStore):
+    """Inverted index and keyword counts over the free-text answers.
+
+    Each answer to a question with a word limit is stored as a document,
+    truncated to that limit. ``postings`` maps every non-stopword term to
+    the documents containing it with its frequency; ``grams`` holds 1-3 word
+    keyword counts per (field, region, day). ``add`` updates both in one
+    small transaction, so search and keyword queries only touch the rows for
+    the terms asked about and never re-read the responses.
+
+    Backed by SQLite in WAL mode, like ``AggregateCube``, so the survey can
+    write while the dashboard reads.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        super().__init__(path)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "id INTEGER PRIMARY KEY, field TEXT NOT NULL, region TEXT NOT NULL, day TEXT NOT NULL, "
+            "text TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings (term TEXT NOT NULL, doc INTEGER NOT NULL, tf INTEGER NOT NULL, "
+            "PRIMARY KEY (term, doc)) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS grams (gram TEXT NOT NULL, size INTEGER NOT NULL, field TEXT NOT NULL, "
+            "region TEXT NOT NULL, day TEXT NOT NULL, tf INTEGER NOT NULL, df INTEGER NOT NULL, "
+            "PRIMARY KEY (gram, field, region, day)) WITHOUT ROWID"
+        )
+
+    def add_many(self, records, ids=None, advance_to=None, submitted_at=None):
+        """Index the free-text answers of canonical records; returns how many records were added.
+
+        ``ids`` and ``advance_to`` have the same meaning as in ``AggregateCube.add_many``.
+        ``submitted_at`` (epoch seconds, one per record) dates the answers for
+        keyword trends; without it they are dated today (UTC).
+        """
+        records = list(records)
+        days = [_day(ts) for ts in submitted_at] if submitted_at is not None else [_day()] * len(records)
+        dated = list(zip(records, days))
+        with self._transaction() as conn:
+            if ids is not None:
+                new = self._claim(conn, ids, advance_to)
+                dated = [pair for pair, keep in zip(dated, new) if keep]
+            for record, day in dated:
+                region = MISSING if is_missing(record.get("region")) else str(record["region"])
+                for q in TEXT_QUESTIONS:
+                    text = record.get(q.column)
+                    if is_missing(text) or not str(text).strip():
+                        continue
+                    self._index(conn, q.column, region, day, truncate_words(str(text), q.max_words))
+            if dated:
+                conn.execute(
+                    "INSERT INTO meta VALUES ('responses', ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (len(dated),),
+                )
+        return len(dated)
+
+    @staticmethod
+    def _index(conn, field, region, day, text):
+        doc = conn.execute(
+            "INSERT INTO docs (field, region, day, text) VALUES (?, ?, ?, ?)", (field, region, day, text)
+        ).lastrowid
+        tokens = tokenize(text)
+        terms = Counter(t for t in tokens if t not in STOPWORDS)
+        conn.executemany("INSERT INTO postings VALUES (?, ?, ?)", [(term, doc, tf) for term, tf in terms.items()])
+        grams = Counter(ngrams(tokens))
+        conn.executemany(
+            "INSERT INTO grams VALUES (?, ?, ?, ?, ?, ?, 1) "
+            "ON CONFLICT(gram, field, region, day) DO UPDATE SET tf = tf + excluded.tf, df = df + 1",
+            [(gram, gram.count(" ") + 1, field, region, day, tf) for gram, tf in grams.items()],
+        )
+
+    def add(self, record, row_id=None):
+        return self.add_many([record], None if row_id is None else [row_id])
+
+    def _fold_rows(self, rows):
+        return self.add_many([canonicalize(row) for _, _, row in rows], ids=[row_id for row_id, _, _ in rows],
+                             advance_to=rows[-1][0], submitted_at=[ts for _, ts, _ in rows])
+
+    def reset(self):
+        super().reset()
+        conn = self._conn()
+        for table in ("docs", "postings", "grams"):
+            conn.execute(f"DELETE FROM {table}")
+
+    # ---- Queries ----
+    @staticmethod
+    def _filters(field, region, prefix=""):
+        clauses, params = [], []
+        if field:
+            clauses.append(f"{prefix}field = ?")
+            params.append(field)
+        if region is not None:
+            clauses.append(f"{prefix}region = ?")
+            params.append(region)
+        return "".join(f" AND {c}" for c in clauses), params
+
+    def search(self, query, field=None, region=None, limit=20):
+        """Answers containing every term of ``query``, best TF-IDF match first.
+
+        Returns a list of dicts with ``field``, ``region``, ``day``, ``text`` and ``score``.
+        """
+        terms = sorted({t for t in tokenize(query) if t not in STOPWORDS})
+        if not terms:
+            return []
+        conn = self._conn()
+        total = conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        marks = ", ".join("?" * len(terms))
+        idf = {term: math.log(1 + total / df) for term, df in conn.execute(
+            f"SELECT term, COUNT(*) FROM postings WHERE term IN ({marks}) GROUP BY term", terms)}
+        if len(idf) < len(terms):
+            return []
+        where, params = self._filters(field, region, "d.")
+        cur = conn.execute(
+            f"SELECT d.id, d.field, d.region, d.day, d.text, p.term, p.tf FROM postings p JOIN docs d ON d.id = p.doc "
+            f"WHERE p.term IN ({marks}){where} "
+            f"AND p.doc IN (SELECT doc FROM postings WHERE term IN ({marks}) GROUP BY doc HAVING COUNT(*) = ?)",
+            terms + params + terms + [len(terms)],
+        )
+        hits = {}
+        for doc, doc_field, doc_region, day, text, term, tf in cur:
+            hit = hits.setdefault(doc, {"field": doc_field, "region": doc_region, "day": day, "text": text,
+                                        "score": 0.0})
+            hit["score"] += (1 + math.log(tf)) * idf[term]
+        return sorted(hits.values(), key=lambda h: -h["score"])[:limit]
+
+    def keywords(self, field=None, region=None, size=None, limit=20):
+        """Most common keywords as dicts with ``gram``, ``answers`` (document count) and ``mentions``."""
+        where, params = self._filters(field, region)
+        if size:
+            where += " AND size = ?"
+            params.append(size)
+        cur = self._conn().execute(
+            f"SELECT gram, SUM(df), SUM(tf) FROM grams WHERE 1 = 1{where} "
+            f"GROUP BY gram ORDER BY SUM(df) DESC, SUM(tf) DESC, gram LIMIT ?",
+            params + [limit],
+        )
+        return [{"gram": gram, "answers": df, "mentions": tf} for gram, df, tf in cur]
+
+    def breakdown(self, gram, by="region", field=None):
+        """Answers mentioning ``gram`` per region or per day (the keyword trend)."""
+        if by not in ("region", "day", "field"):
+            raise ValueError(f"cannot break down by {by!r}")
+        where, params = self._filters(field, None)
+        cur = self._conn().execute(
+            f"SELECT {by}, SUM(df) FROM grams WHERE gram = ?{where} GROUP BY {by} ORDER BY {by}",
+            [" ".join(tokenize(gram))] + params,
+        )
+        return [{by: key, "answers": df} for key, df in cur]
+
+    def total_responses(self):
+        return self._meta("responses")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild the free-text index from CSV exports.")
+    parser.add_argument("csv", nargs="+", help="response CSV files in any historical layout")
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument("--append", action="store_true", help="add to the existing index instead of rebuilding")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    index = TextIndex(args.index)
+    if not args.append:
+        index.reset()
+    for path in args.csv:
+        added = index.add_many(load_csv_records(path))
+        logger.info("Indexed %d response(s) from %s", added, path)
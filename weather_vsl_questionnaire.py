@@ -1,436 +1,373 @@
 import streamlit as st
-import pandas as pd
-import json
-import base64
 import logging
-from github import Github
-from io import StringIO
-
-# ---- Streamlit Page Config ----
-st.set_page_config(page_title="Global WRVSL Survey", layout="wide")
-
-# ---- Custom CSS for Enhanced Visual Appeal & Responsive Design ----
-st.markdown("""
-    <style>
-        body {
-            background-color: #f8f9fa;
-        }
-        .main {
-            background-color: #ffffff;
-            padding: 2rem;
-            margin: 20px;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        }
-        .sidebar .sidebar-content {
-            background-color: #ffffff;
-            border-radius: 10px;
-            padding: 1rem;
-        }
-        .progress-bar {
-            margin-bottom: 1rem;
-        }
-        h1, h2, h3, h4 {
-            color: #333366;
-        }
-        /* Responsive adjustments */
-        @media only screen and (max-width: 600px) {
+import os
+import queue
+
+# Storage, GitHub and the submission queue are imported lazily inside the
+# cached factories below, so a cold start only pays for Streamlit and the schema.
+import metrics
+from sessions import CompactResponses, new_token
+from survey_schema import SECTIONS, SURVEY, Note, count_words, to_record, validate_record
+
+_rerun, _page = metrics.rerun_started(), "landing"
+SECTION_RENDER_SECONDS = metrics.histogram("wrvsl_section_render_seconds", "show_section render time by section.")
+
+# Everything below runs inside try/finally, so reruns ended by st.stop(), st.rerun()
+# or an exception are still timed (and a sampled profiler is always switched off).
+try:
+    # ---- Streamlit Page Config ----
+    st.set_page_config(page_title="Global WRVSL Survey", layout="wide")
+
+    # ---- Logging & Metrics Export (once per process) ----
+    @st.cache_resource
+    def start_instrumentation():
+        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        metrics.start_exporters()
+
+    start_instrumentation()
+
+    # ---- Custom CSS for Enhanced Visual Appeal & Responsive Design ----
+    st.markdown("""
+        <style>
+            body {
+                background-color: #f8f9fa;
+            }
             .main {
+                background-color: #ffffff;
+                padding: 2rem;
+                margin: 20px;
+                border-radius: 10px;
+                box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+            }
+            .sidebar .sidebar-content {
+                background-color: #ffffff;
+                border-radius: 10px;
                 padding: 1rem;
-                margin: 10px;
             }
-            h1 {
-                font-size: 1.5rem;
+            .progress-bar {
+                margin-bottom: 1rem;
             }
-            h2 {
-                font-size: 1.3rem;
+            h1, h2, h3, h4 {
+                color: #333366;
             }
-        }
-    </style>
-    """, unsafe_allow_html=True)
-
-# ---- GitHub Configuration ----
-GITHUB_TOKEN = st.secrets["GITHUB_TOKEN"]
-REPO_NAME = "abdhulkhadhir/WISE_Questionnaire"
-CSV_PATH = "responses.csv"
-
-# ---- Define Survey Sections ----
-SECTIONS = [
-    "Introduction & Participant Context",
-    "System Design",
-    "Operational Challenges",
-    "Impact Assessment",
-    "Lessons Learned",
-    "Policy & Governance",
-    "Future Directions",
-    "Optional Demographics"
-]
-
-# ---- Initialize Session State ----
-if 'landing' not in st.session_state:
-    st.session_state.landing = True
-if 'current_section' not in st.session_state:
-    st.session_state.current_section = 0
-if 'responses' not in st.session_state:
-    st.session_state.responses = {}
-if 'submitted' not in st.session_state:
-    st.session_state.submitted = False
-
-# ---- Landing Page ----
-if st.session_state.landing:
-    st.title("🌍 Weather Responsive VSL (WRVSL) Global State of Practice Survey")
-    st.markdown("""
-        Welcome to the **Global WRVSL Survey**. Our goal is to assess the effectiveness and challenges of Weather Responsive Variable Speed Limit (WRVSL) systems. 
-        Your participation is essential in shaping future implementations, policies, and technological advancements in this field.
-    """)
-    if st.button("Start Survey"):
-        st.session_state.landing = False
-    else:
-        st.stop()  # Prevents further execution until "Start Survey" is clicked
-
-# ---- Sidebar Navigation ----
-st.sidebar.title("📋 Survey Progress")
-progress = (st.session_state.current_section + 1) / len(SECTIONS)
-st.sidebar.progress(progress)
-
-for i, section in enumerate(SECTIONS):
-    if i == st.session_state.current_section:
-        st.sidebar.markdown(f"➡️ **{section}**")
-    else:
-        if st.sidebar.button(section, key=f"btn_{i}"):
-            st.session_state.current_section = i
-
-# ---- Define simplified rating options ----
-criticality_options = [
-    "Most Critical",
-    "Highly Critical",
-    "Moderately Critical",
-    "Slightly Critical",
-    "Not Critical"
-]
-
-emerging_options = [
-    "Most Important",
-    "Highly Important",
-    "Moderately Important",
-    "Least Important"
-]
-
-# ---- Function to Render Sections ----
-def show_section(section_num):
-    st.markdown("<div class='main'>", unsafe_allow_html=True)
-    
-    # Section 0: Introduction & Participant Context
-    if section_num == 0:
-        st.subheader("Participant Context")
-        st.session_state.responses['q1_region'] = st.radio(
-            "1). Geographical region of operation",
-            options=['North America', 'Europe', 'Australia/NZ', 'Asia', 'Middle East', 'Africa', 'South America'],
-            help="Select the region where your operations are based."
-        )
-        st.session_state.responses['q2_experience'] = st.radio(
-            "2). Years of experience with WRVSL systems",
-            options=['<1 year', '1–3 years', '4–7 years', '8+ years'],
-            help="Choose the option that best describes your experience."
-        )
-        st.session_state.responses['q3_org_type'] = st.selectbox(
-            "3). Organization type",
-            options=['Government agency', 'Private consultancy', 'Academic', 'NGO', 'Other'],
-            help="Select the type of organization you are affiliated with."
-        )
-    
-    # Section 1: System Design
-    elif section_num == 1:
-        st.subheader("System Design")
-        st.session_state.responses['q4_vsl_types'] = st.multiselect(
-            "4). Types of VSL systems managed",
-            options=['Congestion-responsive', 'Weather-responsive', 'Event-specific', 'Other'],
-            help="Select all the Variable Speed Limit systems your organization manages."
-        )
-        if 'Other' in st.session_state.responses.get('q4_vsl_types', []):
-            st.session_state.responses['q4_vsl_other'] = st.text_input(
-                "4).a. Please specify other VSL type",
-                help="Enter details if your system type does not fit the listed options."
-            )
-        st.session_state.responses['q5_weather_params'] = st.multiselect(
-            "5). Weather parameter(s) triggering speed adjustments",
-            options=['Rainfall intensity', 'Snow accumulation', 'Pavement friction', 'Visibility', 'Wind speed', 'Other'],
-            help="Select weather parameters that are critical in triggering speed adjustments."
-        )
-        st.session_state.responses['q6_verification'] = st.radio(
-            "6). Verification method for weather inputs",
-            options=['Cameras', 'Alternative data sources', 'None'],
-            help="Choose how you verify the weather data inputs for accuracy."
-        )
-        if st.session_state.responses['q6_verification'] == 'Alternative data sources':
-            st.session_state.responses['q6_verification_sources'] = st.text_input(
-                "6).a. Specify alternative verification sources",
-                help="List the alternative sources used to verify weather inputs."
-            )
-        st.markdown("""7). Data sources used for weather inputs (Criticality Scale below)
-        
-Criticality Scale:
-- Most Critical – Essential and must be addressed immediately  
-- Highly Critical – Very important but not the highest priority  
-- Moderately Critical – Important but not urgent  
-- Slightly Critical – Somewhat important but can be deferred  
-- Not Critical – Minimal impact or not relevant  
-        """, unsafe_allow_html=True)
-        st.session_state.responses['q7_1_rwis'] = st.radio(
-            "7.1) Road Weather Information System (RWIS)/roadside sensors",
-            options=criticality_options,
-            help="Rate the criticality of RWIS sensors."
-        )
-        st.session_state.responses['q7_2_vehicle_telematics'] = st.radio(
-            "7.2) Connected vehicle telematics",
-            options=criticality_options,
-            help="Rate the criticality of connected vehicle data."
-        )
-        st.session_state.responses['q7_3_sat_forecasts'] = st.radio(
-            "7.3) Radar/satellite forecasts",
-            options=criticality_options,
-            help="Rate the criticality of radar/satellite forecasts."
-        )
-        st.session_state.responses['q7_4_thermal_cameras'] = st.radio(
-            "7.4) Thermal/visual cameras",
-            options=criticality_options,
-            help="Rate the criticality of thermal/visual cameras."
-        )
-        st.session_state.responses['q7_5_manual_reports'] = st.radio(
-            "7.5) Manual operator reports",
-            options=criticality_options,
-            help="Rate the criticality of manual operator reports."
-        )
-        st.session_state.responses['q8_control_logic'] = st.radio(
-            "8). Control logic architecture",
-            options=['Rule-based thresholds (fixed)', 'Dynamic thresholds (real-time adjustments)', 'Machine learning based'],
-            help="Select the type of control logic used in your system."
-        )
-        st.session_state.responses['q9_operation_mode'] = st.radio(
-            "9). Mode of operation",
-            options=['Alert only', 'System-recommended with operator approval', 'Fully automated'],
-            help="Select the operational mode that best describes your system."
-        )
-        st.session_state.responses['q10_deactivation_mode'] = st.radio(
-            "10). Mode of deactivation",
-            options=['Manual removal', 'Automated with operator alert', 'Automated without alert'],
-            help="Choose how the system is deactivated under normal conditions."
-        )
-        st.session_state.responses['q11_speed_adjustment'] = st.radio(
-            "11). Speed adjustment protocols",
-            options=['Fixed increments', 'Dynamic models', 'Operator discretion'],
-            help="Select how speed adjustments are determined."
-        )
-        st.session_state.responses['q12_geo_coverage'] = st.radio(
-            "12). Geographic coverage",
-            options=['Within 5km of sensor', 'Entire carriageway', 'Overlapping zones'],
-            help="Select the geographical coverage of your WRVSL system."
-        )
-    
-    # Section 2: Operational Challenges
-    elif section_num == 2:
-        st.subheader("Operational Challenges")
-        st.markdown("""13). Challenge severity (Criticality Scale below)
-        
-Criticality Scale:
-- Most Critical – Essential and must be addressed immediately  
-- Highly Critical – Very important but not the highest priority  
-- Moderately Critical – Important but not urgent  
-- Slightly Critical – Somewhat important but can be deferred  
-- Not Critical – Minimal impact or not relevant  
+            /* Responsive adjustments */
+            @media only screen and (max-width: 600px) {
+                .main {
+                    padding: 1rem;
+                    margin: 10px;
+                }
+                h1 {
+                    font-size: 1.5rem;
+                }
+                h2 {
+                    font-size: 1.3rem;
+                }
+            }
+        </style>
         """, unsafe_allow_html=True)
-        challenges = {
-            "13.1) Sensor reliability": "q13_sensor_reliability",
-            "13.2) Driver compliance": "q13_driver_compliance",
-            "13.3) Maintenance costs": "q13_maintenance_costs",
-            "13.4) Inter-agency coordination": "q13_coordination",
-            "13.5) Operational FTE/resources": "q13_fte_challenge"
-        }
-        for label, key in challenges.items():
-            st.session_state.responses[key] = st.radio(
-                label,
-                options=criticality_options,
-                help=f"Rate the severity of {label.split()[1].lower()}."
-            )
-        st.session_state.responses['q14_mitigation_strategies'] = st.multiselect(
-            "14). Mitigation strategies for non-compliance",
-            options=['Public education campaigns', 'Dynamic signage with penalty warnings', 'Automated enforcement', 'None'],
-            help="Select all strategies you employ to address non-compliance."
-        )
-    
-    # Section 3: Impact Assessment
-    elif section_num == 3:
-        st.subheader("Impact Assessment")
-        st.session_state.responses['q15_primary_crash_reduction'] = st.slider(
-            "15). Primary crash reduction (%)",
-            0, 100, help="Estimate the percentage improvement in safety (primary crash reduction) due to WRVSL."
-        )
-        st.session_state.responses['q16_secondary_crash_reduction'] = st.slider(
-            "16). Secondary crash reduction (%)",
-            0, 100, help="Estimate the percentage improvement in safety (secondary crash reduction) due to WRVSL."
-        )
-        st.session_state.responses['q17_safety_source'] = st.radio(
-            "17). Data source for safety improvement",
-            options=['Field', 'Simulation'],
-            help="Select whether the safety data is based on field observations or simulation results."
-        )
-        st.session_state.responses['q18_speed_compliance'] = st.slider(
-            "18). Speed compliance rate (%)",
-            0, 100, help="Indicate the observed or expected speed compliance rate."
-        )
-        st.session_state.responses['q19_speed_source'] = st.radio(
-            "19). Data source for speed compliance",
-            options=['Field', 'Simulation'],
-            help="Select whether the speed compliance data is based on field data or simulation."
-        )
-    
-    # Section 4: Lessons Learned
-    elif section_num == 4:
-        st.subheader("Lessons Learned")
-        st.session_state.responses['q20_success_story'] = st.text_area(
-            "20). Success story (Max 200 words)",
-            help="Share a success story related to WRVSL implementation. Please keep within 200 words."
-        )
-        st.session_state.responses['q21_unexpected_challenges'] = st.text_area(
-            "21). Unexpected challenges & resolution (Max 150 words)",
-            help="Describe any unforeseen challenges and how they were addressed, keeping within 150 words."
-        )
-    
-    # Section 5: Policy & Governance
-    elif section_num == 5:
-        st.subheader("Policy & Governance")
-        st.session_state.responses['q22_regulations'] = st.multiselect(
-            "22). Regulatory frameworks used",
-            options=['Austroads Guidelines', 'MUTCD Section 4L', 'EU Directive 2021/034', 'Other'],
-            help="Select all regulatory frameworks that influence your system."
-        )
-        if 'Other' in st.session_state.responses.get('q22_regulations', []):
-            st.session_state.responses['q22_regulations_other'] = st.text_input(
-                "22).a. Please specify other regulatory frameworks",
-                help="Enter additional details if other regulatory frameworks apply."
-            )
-        st.markdown("**23). Multi-agency collaboration frequency**")
-        st.session_state.responses['q23_meteorology'] = st.radio(
-            "23.1) Meteorological department",
-            options=['Daily', 'Weekly', 'Monthly', 'Never'],
-            help="How often do you collaborate with the meteorological department?"
-        )
-        st.session_state.responses['q23_law_enforcement'] = st.radio(
-            "23.2) Law enforcement",
-            options=['Daily', 'Weekly', 'Monthly', 'Never'],
-            help="How frequently is there interaction with law enforcement?"
-        )
-        st.session_state.responses['q23_road_maintenance'] = st.radio(
-            "23.3) Road maintenance teams",
-            options=['Daily', 'Weekly', 'Monthly', 'Never'],
-            help="Indicate how often you engage with road maintenance teams."
-        )
-    
-    # Section 6: Future Directions
-    elif section_num == 6:
-        st.subheader("Future Directions")
-        st.markdown("""24). Rank emerging technologies (Ranking Scale below)
-        
-Ranking Scale:  
-• Most Important – Game-changing technology with immediate and significant impact  
-• Highly Important – Strong potential for impact but not the top priority  
-• Moderately Important – Has relevance but not a critical focus area  
-• Least Important – Low impact or not a priority at this time""", unsafe_allow_html=True)
-        st.session_state.responses['q24_ai_ml'] = st.radio(
-            "24.1) AI/ML prediction models",
-            options=emerging_options,
-            help="Select the ranking for AI/ML models for predicting weather-related impacts."
-        )
-        st.session_state.responses['q24_iot_sensors'] = st.radio(
-            "24.2) Satellite-connected IoT sensors",
-            options=emerging_options,
-            help="Select the ranking for IoT sensors in your system."
-        )
-        st.session_state.responses['q24_cv_integration'] = st.radio(
-            "24.3) Connected vehicle integration",
-            options=emerging_options,
-            help="Select the ranking for connected vehicle data integration."
-        )
-        st.session_state.responses['q25_research_gaps'] = st.text_area(
-            "25). Research gaps hindering WRVSL advancements (100 words max)",
-            help="Briefly describe the research gaps that need to be addressed to advance WRVSL technology."
-        )
-    
-    # Section 7: Optional Demographics
-    elif section_num == 7:
-        st.subheader("Optional Demographics")
-        st.session_state.responses['q26_follow_up'] = st.radio(
-            "26). Contact for follow-up?",
-            options=['Yes', 'No'],
-            help="Indicate if you are willing to be contacted for follow-up questions."
-        )
-        if st.session_state.responses['q26_follow_up'] == 'Yes':
-            st.session_state.responses['q27_email'] = st.text_input(
-                "27). Enter email",
-                help="Please provide your email address for further contact."
-            )
-        with st.expander("Review Your Answers"):
-            st.markdown("### Summary of Your Responses")
-            for key, value in st.session_state.responses.items():
-                st.markdown(f"**{key}**: {value}")
-    
-    st.markdown("</div>", unsafe_allow_html=True)
-
-# ---- Call Function to Render Section ----
-show_section(st.session_state.current_section)
-
-# ---- Function to Save and Append Responses to GitHub ----
-def save_to_github(new_df):
-    try:
-        logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-        g = Github(GITHUB_TOKEN)
-        repo = g.get_repo(REPO_NAME)
+
+    # ---- Storage Configuration ----
+    # "sqlite" (default): local WAL database, mirrored to GitHub in bulk when a token is set.
+    # "github": local journal committed straight to GitHub; requires a token.
+    STORAGE_BACKEND = os.environ.get("WRVSL_STORAGE", "sqlite")
+
+    def get_github_token():
+        token = os.environ.get("GITHUB_TOKEN")
+        if token:
+            return token
         try:
-            # Attempt to get the existing file from the repository
-            file = repo.get_contents(CSV_PATH)
-            csv_data = file.decoded_content.decode('utf-8')
-            existing_df = pd.read_csv(StringIO(csv_data))
-            updated_df = pd.concat([existing_df, new_df], ignore_index=True)
-            file_content = updated_df.to_csv(index=False)
-            repo.update_file(CSV_PATH, "Update WRVSL responses", file_content, file.sha)
-        except Exception as e:
-            # If the file doesn't exist, create a new one with the new response
-            file_content = new_df.to_csv(index=False)
-            repo.create_file(CSV_PATH, "Create WRVSL responses", file_content)
-    except Exception as e:
-        logging.error(f"Error saving to GitHub: {e}")
-
-# ---- Navigation Button Callbacks ----
-def previous_section():
-    st.session_state.current_section -= 1
-
-def next_section():
-    st.session_state.current_section += 1
-
-# ---- Navigation Buttons ----
-col1, col2 = st.columns(2)
-with col1:
-    if st.session_state.current_section > 0:
-        st.button("⬅️ Previous", on_click=previous_section)
-with col2:
-    if st.session_state.current_section < len(SECTIONS) - 1:
-        st.button("Next ➡️", on_click=next_section)
-    else:
-        # Instead of immediate submission, open a confirmation modal.
-        if st.button("✅ Submit"):
-            # Open a modal dialog for confirmation
-            with st.modal("Confirm Submission"):
-                st.markdown("### Please review your responses below before final submission:")
+            return st.secrets.get("GITHUB_TOKEN")
+        except FileNotFoundError:
+            return None
+
+    # ---- Initialize Session State ----
+    if 'landing' not in st.session_state:
+        st.session_state.landing = True
+    if 'current_section' not in st.session_state:
+        st.session_state.current_section = 0
+    if 'responses' not in st.session_state:
+        st.session_state.responses = CompactResponses()
+    if 'submitted' not in st.session_state:
+        st.session_state.submitted = False
+    if 'submission_id' not in st.session_state:
+        st.session_state.submission_id = None
+    if 'confirming' not in st.session_state:
+        st.session_state.confirming = False
+
+    # ---- Drafts & Idle Eviction (shared by all sessions) ----
+    @st.cache_resource
+    def get_sessions():
+        from sessions import DraftStore, SessionRegistry
+        sessions = SessionRegistry(DraftStore()).start()
+        metrics.gauge("wrvsl_active_sessions", "Sessions holding answers in memory.", fn=sessions.active)
+        return sessions
+
+    def save_draft():
+        get_sessions().save(st.session_state.resume_token, st.session_state.responses,
+                            st.session_state.current_section)
+
+    if 'resume_token' not in st.session_state:
+        # A bookmarked ?resume=<token> link picks the survey up where it was left.
+        token = st.query_params.get("resume")
+        section = get_sessions().resume(token, st.session_state.responses) if token else None
+        if section is not None:
+            st.session_state.landing = False
+            st.session_state.current_section = section
+        st.session_state.resume_token = token if section is not None else new_token()
+
+    # ---- Landing Page ----
+    if st.session_state.landing:
+        st.title("🌍 Weather Responsive VSL (WRVSL) Global State of Practice Survey")
+        st.markdown("""
+            Welcome to the **Global WRVSL Survey**. Our goal is to assess the effectiveness and challenges of Weather Responsive Variable Speed Limit (WRVSL) systems. 
+            Your participation is essential in shaping future implementations, policies, and technological advancements in this field.
+        """)
+        if st.button("Start Survey"):
+            st.session_state.landing = False
+            st.query_params["resume"] = st.session_state.resume_token
+        else:
+            st.stop()  # Prevents further execution until "Start Survey" is clicked
+    _page = "survey"
+
+    get_sessions().touch(st.session_state.resume_token, st.session_state.responses,
+                         st.session_state.current_section)
+
+    # ---- Sidebar Navigation ----
+    st.sidebar.title("📋 Survey Progress")
+    progress = (st.session_state.current_section + 1) / len(SECTIONS)
+    st.sidebar.progress(progress)
+
+    for i, section in enumerate(SECTIONS):
+        if i == st.session_state.current_section:
+            st.sidebar.markdown(f"➡️ **{section}**")
+        else:
+            if st.sidebar.button(section, key=f"btn_{i}"):
+                st.session_state.current_section = i
+                save_draft()
+    if not st.session_state.submitted:
+        st.sidebar.caption("Your answers are saved as you move between sections. "
+                           "Bookmark this page to resume later.")
+
+    # ---- Generic Question Renderer (driven by survey_schema) ----
+    def render_question(q):
+        responses = st.session_state.responses
+        # Widget state is discarded when a section is not shown; re-seed it from the saved answer.
+        if q.key not in st.session_state and q.key in responses:
+            st.session_state[q.key] = responses[q.key]
+        if q.kind in ("radio", "selectbox", "multiselect"):
+            widget = getattr(st, q.kind)
+            responses[q.key] = widget(q.label, options=q.options, help=q.help, key=q.key)
+        elif q.kind == "slider":
+            responses[q.key] = st.slider(q.label, q.min_value, q.max_value, help=q.help, key=q.key)
+        else:
+            widget = getattr(st, q.kind)
+            responses[q.key] = widget(q.label, help=q.help, key=q.key)
+            if q.max_words is not None:
+                words = count_words(responses[q.key])
+                if words > q.max_words:
+                    st.error(f"{words}/{q.max_words} words — please shorten your answer.")
+                else:
+                    st.caption(f"{words}/{q.max_words} words")
+
+    # ---- Function to Render Sections ----
+    # A fragment: answering a question reruns only this function, not the CSS,
+    # sidebar or navigation. Navigation buttons sit outside and trigger a full rerun.
+    @st.fragment
+    def show_section(section_num):
+        get_sessions().touch(st.session_state.resume_token, st.session_state.responses, section_num)
+        with SECTION_RENDER_SECONDS.time(section=SECTIONS[section_num]):
+            render_section(section_num)
+
+    def render_section(section_num):
+        st.markdown("<div class='main'>", unsafe_allow_html=True)
+        section = SURVEY[section_num]
+        st.subheader(section.subheader)
+        for item in section.items:
+            if isinstance(item, Note):
+                st.markdown(item.text, unsafe_allow_html=True)
+            elif item.is_visible(st.session_state.responses):
+                render_question(item)
+            else:
+                st.session_state.responses.pop(item.key, None)
+
+        if section_num == len(SURVEY) - 1:
+            with st.expander("Review Your Answers"):
+                st.markdown("### Summary of Your Responses")
                 for key, value in st.session_state.responses.items():
                     st.markdown(f"**{key}**: {value}")
-                st.markdown("---")
-                confirm = st.button("Confirm Submission")
-                cancel = st.button("Cancel Submission")
-                if confirm:
-                    df = pd.DataFrame([st.session_state.responses])
-                    save_to_github(df)
-                    st.success("Responses saved successfully! 🎉")
-                    st.session_state.submitted = True
-                    st.experimental_rerun()  # Refresh page after submission
-                if cancel:
-                    st.info("Submission cancelled. You can review and modify your responses.")
+
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    # ---- Call Function to Render Section ----
+    show_section(st.session_state.current_section)
+
+    # ---- Shared GitHub Client (one pooled connection set for all sessions) ----
+    @st.cache_resource
+    def get_github_client():
+        token = get_github_token()
+        if token is None:
+            return None
+        from github_client import GitHubClient
+        from storage import REPO_NAME
+        client = GitHubClient(token, REPO_NAME)
+        metrics.gauge("wrvsl_github_rate_limit_remaining", "GitHub API requests left in the current window.",
+                      fn=lambda: client.rate_limit()["remaining"])
+        return client
+
+    # ---- Response Storage (shared by all sessions) ----
+    @st.cache_resource
+    def get_storage():
+        """Return ``(backend, replicator)``; ``replicator`` is None when nothing mirrors the backend."""
+        from storage import (
+            SQLITE_PATH, GitHubBackend, GroupCommitFlusher, PartitionedCommitWriter, SQLiteBackend
+        )
+
+        client = get_github_client()
+        if STORAGE_BACKEND == "github":
+            if client is None:
+                raise RuntimeError("WRVSL_STORAGE=github requires a GITHUB_TOKEN")
+            backend = GitHubBackend(client.get_repo, quota=client.write_delay)
+            metrics.gauge("wrvsl_unflushed_responses", "Responses not yet committed to GitHub.",
+                          fn=backend.journal.pending_count)
+            return backend, None
+        backend = SQLiteBackend(SQLITE_PATH)
+        if client is None:
+            return backend, None
+        metrics.gauge("wrvsl_unflushed_responses", "Responses not yet committed to GitHub.",
+                      fn=backend.pending_count)
+        writer = PartitionedCommitWriter(client.get_repo)
+        return backend, GroupCommitFlusher(backend, writer, quota=client.write_delay).start()
+
+    # ---- Analytics Cube (updated incrementally on every append) ----
+    @st.cache_resource
+    def get_cube():
+        from analytics import AggregateCube
+
+        cube = AggregateCube()
+        if STORAGE_BACKEND == "sqlite":
+            # SQLite reads back in append order, so anything missed (e.g. a crash) can be replayed.
+            cube.catch_up(get_storage()[0])
+        return cube
+
+    # ---- Free-Text Index (updated incrementally on every append) ----
+    @st.cache_resource
+    def get_text_index():
+        from text_index import TextIndex
+
+        index = TextIndex()
+        if STORAGE_BACKEND == "sqlite":
+            index.catch_up(get_storage()[0])
+        return index
+
+    # ---- Function to Save a Response ----
+    def save_response(record):
+        backend, replicator = get_storage()
+        cube = get_cube()
+        text_index = get_text_index()
+        submission_id = backend.append(dict(record))
+        if replicator is not None:
+            replicator.notify()
+        # SQLite ids let a catch-up (here or in a bulk import) skip what was already added.
+        row_id = submission_id if STORAGE_BACKEND == "sqlite" else None
+        # The response itself is saved; don't let a failure here make a retry append it twice.
+        try:
+            cube.add(record, row_id)
+        except Exception:
+            logging.exception("Updating the analytics cube failed")
+        try:
+            text_index.add(record, row_id)
+        except Exception:
+            logging.exception("Updating the free-text index failed")
+        return submission_id
+
+    # ---- Background Submission Queue (shared by all sessions) ----
+    @st.cache_resource
+    def get_submission_queue():
+        from submission_queue import SubmissionQueue
+        submissions = SubmissionQueue(save_response).start()
+        metrics.gauge("wrvsl_submission_queue_depth", "Submissions waiting to be persisted.", fn=submissions.depth)
+        return submissions
+
+    # ---- Submission Dialog & Status ----
+    def open_confirmation():
+        st.session_state.confirming = True
+
+    def close_confirmation():
+        st.session_state.confirming = False
+
+    @st.dialog("Confirm Submission", on_dismiss=close_confirmation)
+    def confirm_submission():
+        st.markdown("### Please review your responses below before final submission:")
+        for key, value in st.session_state.responses.items():
+            st.markdown(f"**{key}**: {value}")
+        st.markdown("---")
+        confirm = st.button("Confirm Submission")
+        cancel = st.button("Cancel Submission", on_click=close_confirmation)
+        if confirm:
+            record = to_record(st.session_state.responses)
+            errors = validate_record(record)
+            if errors:
+                st.error("Please fix the following before submitting:\n\n" + "\n".join(f"- {e}" for e in errors))
+                return
+            try:
+                st.session_state.submission_id = get_submission_queue().submit(record)
+            except queue.Full:
+                st.error("The server is busy right now. Please try submitting again in a moment.")
+                return
+            st.session_state.submitted = True
+            st.session_state.confirming = False
+            get_sessions().finish(st.session_state.resume_token)
+            st.query_params.pop("resume", None)
+            st.rerun()
+        if cancel:
+            st.info("Submission cancelled. You can review and modify your responses.")
+
+    @st.fragment(run_every=1.0)
+    def poll_submission_status():
+        from submission_queue import SAVED
+        status = get_submission_queue().status(st.session_state.submission_id)
+        if status is None or status['state'] == SAVED:
+            st.rerun()  # stop polling; the full rerun shows the final message
+        elif status['error']:
+            st.warning("Still saving your responses — the storage service is slow, we will keep retrying.")
+        else:
+            st.info("Saving your responses…")
+
+    def show_submission_status():
+        from submission_queue import SAVED
+        status = get_submission_queue().status(st.session_state.submission_id)
+        if status is None:
+            # Statuses live in memory only: pruned, or lost with a restart.
+            st.info("Your responses were submitted. Their save status is no longer available.")
+        elif status['state'] == SAVED:
+            st.success("Responses saved successfully! 🎉")
+        else:
+            poll_submission_status()
+
+    # ---- Navigation Button Callbacks ----
+    def previous_section():
+        st.session_state.current_section -= 1
+        save_draft()
+
+    def next_section():
+        st.session_state.current_section += 1
+        save_draft()
+
+    # ---- Navigation Buttons ----
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.session_state.current_section > 0:
+            st.button("⬅️ Previous", on_click=previous_section)
+    with col2:
+        if st.session_state.current_section < len(SECTIONS) - 1:
+            st.button("Next ➡️", on_click=next_section)
+        else:
+            if st.session_state.submitted:
+                show_submission_status()
+            else:
+                # Instead of immediate submission, open a confirmation dialog.
+                st.button("✅ Submit", on_click=open_confirmation)
+                if st.session_state.confirming:
+                    confirm_submission()
+finally:
+    metrics.rerun_finished(_rerun, page=_page)